@@ -0,0 +1,4 @@
+# PICO Chord keyboard support modules
+#
+# keyboard.py builds the keyboard out of these and code.py runs it. Copy
+# the whole picochord folder onto the root of the PICO alongside code.py.
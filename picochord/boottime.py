@@ -0,0 +1,45 @@
+# Start up timing
+#
+# Records how long the keyboard takes to start, from code.py starting
+# to the first scan of the keys, and how much of the heap is in use at
+# each step. time.monotonic_ns() counts from power up, so after a power
+# up or reset the time before code.py started is shown as well.
+
+import gc
+import time
+
+mem_alloc = getattr(gc, "mem_alloc", None)
+
+
+class BootTimer:
+
+    def __init__(self, start_ns=None):
+        if start_ns is None:
+            start_ns = time.monotonic_ns()
+        self.start_ns = start_ns
+        # (name, time, heap in use) for each step
+        self.marks = []
+
+    def mark(self, name):
+        heap = None
+        if mem_alloc is not None:
+            heap = mem_alloc()
+        self.marks.append((name, time.monotonic_ns(), heap))
+
+    def elapsed_ms(self):
+        # time from code.py starting to the last mark
+        if not self.marks:
+            return 0
+        return (self.marks[-1][1] - self.start_ns) / 1000000
+
+    def report(self):
+        print("Start up: code.py started {0:.0f} ms after power up".format(
+            self.start_ns / 1000000))
+        last = self.start_ns
+        for name, ns, heap in self.marks:
+            line = "{0:16}{1:8.1f} ms {2:8.1f} ms".format(name, (ns - last) / 1000000,
+                (ns - self.start_ns) / 1000000)
+            if heap is not None:
+                line = line + " {0:7} bytes".format(heap)
+            print(line)
+            last = ns
@@ -0,0 +1,42 @@
+# Character to chord index
+#
+# Maps each ASCII character to the chord that types it, built once from
+# the decode tables. An entry is a (bits, state, pattern) tuple, where
+# pattern holds a flag for each pixel saying whether that key is part
+# of the chord. Characters with no chord have None.
+
+INDEX_SIZE = 128
+
+
+def build_char_index(maps, keys):
+    # maps is a sequence of (decode, state, upper_state) in priority order.
+    # upper_state is the state that types the upper case version of the
+    # characters in the decode, or None.
+    pixel_count = 0
+    for key in keys:
+        if key.pixel >= pixel_count:
+            pixel_count = key.pixel + 1
+    patterns = {}
+    index = [None] * INDEX_SIZE
+
+    def add(ch, bits, state):
+        if len(ch) != 1:
+            # chords that type several characters can't be guided
+            return
+        code = ord(ch)
+        if code >= INDEX_SIZE or index[code] is not None:
+            return
+        if bits not in patterns:
+            pattern = [False] * pixel_count
+            for key in keys:
+                pattern[key.pixel] = (bits & key.bit) != 0
+            patterns[bits] = tuple(pattern)
+        index[code] = (bits, state, patterns[bits])
+
+    for decode, state, upper_state in maps:
+        for bits in decode:
+            ch = decode[bits]
+            add(ch, bits, state)
+            if upper_state is not None:
+                add(ch.upper(), bits, upper_state)
+    return tuple(index)
@@ -0,0 +1,193 @@
+# Per key debouncing
+#
+# Switches don't all bounce for the same time. TunedScanner samples the
+# keys every millisecond and gives each one its own debounce interval,
+# so a clean switch doesn't have to wait as long as the worst one. The
+# intervals can be measured by calibration, where the scanner times the
+# bursts of edges each switch makes as it is pressed and released, and
+# kept in the non-volatile memory so they survive a power cycle.
+#
+# In the normal mode a key changes once it has read the same level for
+# its interval. In eager mode a key changes on the first edge and then
+# ignores the key for its interval while the contacts bounce.
+
+from array import array
+import time
+
+from picochord.events import ticks_ms, ticks_ms_add, ticks_ms_diff
+
+# limits on a calibrated interval
+MIN_INTERVAL_MS = 1
+MAX_INTERVAL_MS = 20
+# edges further apart than this are taken to be separate presses
+BURST_GAP_MS = MAX_INTERVAL_MS
+# marks the debounce settings in the non-volatile memory
+NVM_TAG = b"DB"
+
+
+class TunedScanner:
+
+    def __init__(self, bank, intervals, eager=False):
+        # intervals gives the debounce time in milliseconds for each key,
+        # indexed by the bit number of the key in the bank mask
+        self.bank = bank
+        self.mask = bank.mask
+        self.key_count = 0
+        while (1 << self.key_count) <= self.mask:
+            self.key_count = self.key_count + 1
+        self.intervals = bytearray(self.key_count)
+        self.set_intervals(intervals)
+        self.eager = eager
+        self.sample_ms = 1
+        self.state = bank.read()
+        self.last_raw = self.state
+        self.pressed = 0
+        self.released = 0
+        now = ticks_ms()
+        # time of the last raw change and of the last debounced change
+        # of each key
+        self.changed_ms = array("L", [now] * self.key_count)
+        self.edge_ms = array("L", [now] * self.key_count)
+        self.next_sample = now
+        self.calibrating = False
+
+    def set_intervals(self, intervals):
+        for bit_number in range(self.key_count):
+            self.intervals[bit_number] = intervals[bit_number]
+
+    def debounce(self, raw, now=None):
+        # Feed one raw sample taken at now, in ticks_ms. Returns the mask of
+        # keys whose debounced state changed on this sample.
+        if now is None:
+            now = ticks_ms()
+        raw = raw & self.mask
+        moved = raw ^ self.last_raw
+        self.last_raw = raw
+        if moved:
+            for bit_number in range(self.key_count):
+                bit = 1 << bit_number
+                if moved & bit:
+                    self.changed_ms[bit_number] = now
+                    if self.calibrating:
+                        self.record_edge(bit_number, raw & bit, now)
+        toggle = 0
+        delta = raw ^ self.state
+        if delta:
+            for bit_number in range(self.key_count):
+                bit = 1 << bit_number
+                if delta & bit:
+                    interval = self.intervals[bit_number]
+                    if self.eager:
+                        # change at once unless the key changed recently
+                        if ticks_ms_diff(now, self.edge_ms[bit_number]) >= interval:
+                            toggle = toggle | bit
+                            self.edge_ms[bit_number] = now
+                    elif ticks_ms_diff(now, self.changed_ms[bit_number]) >= interval:
+                        # the key has settled at the new level
+                        toggle = toggle | bit
+        self.state = self.state ^ toggle
+        self.pressed = toggle & self.state
+        self.released = toggle & ~self.state
+        return toggle
+
+    def read(self):
+        return self.bank.read()
+
+    def scan(self):
+        now = ticks_ms()
+        self.next_sample = ticks_ms_add(now, self.sample_ms)
+        return self.debounce(self.bank.read(), now)
+
+    def due(self):
+        # Returns True if a sample period has passed, and starts the next
+        # one. If not, the pressed and released masks are cleared.
+        now = ticks_ms()
+        if ticks_ms_diff(now, self.next_sample) < 0:
+            self.pressed = 0
+            self.released = 0
+            return False
+        self.next_sample = ticks_ms_add(now, self.sample_ms)
+        return True
+
+    def update(self):
+        if not self.due():
+            return False
+        return self.debounce(self.bank.read()) != 0
+
+    def any_down(self):
+        return self.state != 0
+
+    def wait(self, timeout):
+        delay = ticks_ms_diff(self.next_sample, ticks_ms()) / 1000
+        if delay > timeout:
+            delay = timeout
+        if delay > 0:
+            time.sleep(delay)
+        return False
+
+    def deinit(self):
+        self.bank.deinit()
+
+    # calibration
+
+    def start_calibration(self):
+        now = ticks_ms()
+        # longest burst of edges seen on each key
+        self.bounce_ms = bytearray(self.key_count)
+        self.burst_start = array("L", [now] * self.key_count)
+        self.last_edge = array("L", [now] * self.key_count)
+        self.presses = bytearray(self.key_count)
+        self.calibrating = True
+
+    def record_edge(self, bit_number, down, now):
+        if ticks_ms_diff(now, self.last_edge[bit_number]) > BURST_GAP_MS:
+            # the first edge of a press or release
+            self.burst_start[bit_number] = now
+            if down and self.presses[bit_number] < 255:
+                self.presses[bit_number] = self.presses[bit_number] + 1
+        else:
+            bounce = ticks_ms_diff(now, self.burst_start[bit_number])
+            if bounce > self.bounce_ms[bit_number]:
+                self.bounce_ms[bit_number] = min(bounce, 255)
+        self.last_edge[bit_number] = now
+
+    def calibrated(self, presses):
+        # True when every key has been pressed at least presses times and
+        # they have all settled back up
+        if self.state or self.last_raw:
+            return False
+        for bit_number in range(self.key_count):
+            if self.mask & (1 << bit_number) and self.presses[bit_number] < presses:
+                return False
+        return True
+
+    def finish_calibration(self, margin_ms=1):
+        # Stop calibrating and use intervals that cover the longest bounce
+        # seen on each key. Returns the new intervals.
+        self.calibrating = False
+        for bit_number in range(self.key_count):
+            interval = self.bounce_ms[bit_number] + margin_ms
+            if interval < MIN_INTERVAL_MS:
+                interval = MIN_INTERVAL_MS
+            if interval > MAX_INTERVAL_MS:
+                interval = MAX_INTERVAL_MS
+            self.intervals[bit_number] = interval
+        return bytes(self.intervals)
+
+
+def load_intervals(nvm, count, offset=0):
+    # Returns the intervals saved by save_intervals, or None if there
+    # aren't any for this many keys
+    if nvm is None:
+        return None
+    end = offset + len(NVM_TAG)
+    if nvm[offset:end] != NVM_TAG or nvm[end] != count:
+        return None
+    return bytes(nvm[end + 1:end + 1 + count])
+
+
+def save_intervals(nvm, intervals, offset=0):
+    data = NVM_TAG + bytes([len(intervals)]) + bytes(intervals)
+    # only write when something has changed, to save wear on the flash
+    if nvm[offset:offset + len(data)] != data:
+        nvm[offset:offset + len(data)] = data
@@ -0,0 +1,38 @@
+# Compiled chord dispatch tables
+#
+# Six keys give 64 possible chords, so each keyboard state gets a flat
+# 64 entry tuple indexed by the chord bits. An entry is the character
+# to send (already upper cased for the upper case state), the command
+# tuple to run, or None if the chord does nothing in that state.
+
+CHORD_COUNT = 64
+
+
+def compile_decode(decode, commands, upper=False):
+    table = [None] * CHORD_COUNT
+    # characters take priority over commands on the same chord
+    for bits in commands:
+        table[bits] = commands[bits]
+    for bits in decode:
+        ch = decode[bits]
+        if upper:
+            ch = ch.upper()
+        table[bits] = ch
+    return tuple(table)
+
+
+def compile_state_tables(state_decodes, commands, upper_state):
+    tables = []
+    for state in range(len(state_decodes)):
+        tables.append(compile_decode(state_decodes[state], commands, state == upper_state))
+    return tuple(tables)
+
+
+def table_decode(table):
+    # The characters in a compiled table, as a decode dictionary
+    decode = {}
+    for bits in range(len(table)):
+        entry = table[bits]
+        if type(entry) is str:
+            decode[bits] = entry
+    return decode
@@ -0,0 +1,200 @@
+# Non-blocking text output for the 14 segment display
+#
+# Seg14x4.marquee() sleeps between every character, which stops the
+# keyboard being scanned while a message scrolls past. The scheduler
+# prints one marquee frame at a time from the main loop instead.
+#
+# With auto_write on, every fill() and print() is a separate I2C
+# transfer, and each one waits for the bus lock. DisplayFrame lets the
+# display be made with auto_write off, so that changes only go into its
+# buffer, and sends the whole buffer in one transfer from the main loop.
+# A frame that is replaced before it has been sent is never sent, and
+# if the bus is busy the frame waits for the next loop rather than
+# holding up the scan.
+
+import time
+
+
+class DisplayFrame:
+
+    def __init__(self, display):
+        # display is a Seg14x4 made with auto_write=False. Its buffer holds
+        # the display RAM address, which is 0, and then the 16 bytes of RAM.
+        self.buffer = display._buffer
+        device = display.i2c_device
+        self.i2c = device.i2c
+        self.address = device.device_address
+        # what the display is showing, so an unchanged frame isn't sent
+        self.sent = bytearray(len(self.buffer))
+        # the display is in an unknown state until the first frame
+        self.dirty = True
+        self.first_frame = True
+        # frames sent, frames replaced before they were sent, and sends put
+        # off because the bus was busy
+        self.transmitted = 0
+        self.superseded = 0
+        self.bus_busy = 0
+
+    def changed(self):
+        # Called when the buffer has been changed
+        if self.dirty:
+            self.superseded = self.superseded + 1
+        self.dirty = True
+
+    def flush(self):
+        # Send the frame if it has changed. Returns True if it was sent.
+        if not self.dirty:
+            return False
+        buffer = self.buffer
+        if buffer == self.sent and not self.first_frame:
+            # changed back to what is already showing
+            self.dirty = False
+            return False
+        i2c = self.i2c
+        if not i2c.try_lock():
+            self.bus_busy = self.bus_busy + 1
+            return False
+        try:
+            i2c.writeto(self.address, buffer)
+        finally:
+            i2c.unlock()
+        self.sent[:] = buffer
+        self.dirty = False
+        self.first_frame = False
+        self.transmitted = self.transmitted + 1
+        return True
+
+    def reset_counters(self):
+        self.transmitted = 0
+        self.superseded = 0
+        self.bus_busy = 0
+
+
+class DisplayScheduler:
+
+    def __init__(self, display, delay=0.25, frame=None, glyphs=None):
+        self.display = display
+        self.delay = delay
+        # the DisplayFrame that sends the display buffer, or None if the
+        # display writes its own changes
+        self.frame = frame
+        # the GlyphCache that writes text into the display buffer, or None
+        # to print through the display
+        self.glyphs = glyphs
+        # the message being scrolled, None when the display is idle
+        self.text = None
+        self.pos = 0
+        self.next_time = 0
+        # text to put up when the current message has finished
+        self.pending = None
+        # True while the display shows a TypedHistory drawn by the glyphs
+        self.history_shown = False
+
+    @property
+    def busy(self):
+        return self.text is not None
+
+    @property
+    def dirty(self):
+        # True if there is a change waiting to be sent to the display
+        return self.frame is not None and self.frame.dirty
+
+    def changed(self):
+        if self.frame is not None:
+            self.frame.changed()
+
+    def cancel(self):
+        self.text = None
+        self.pending = None
+        # anything shown next replaces the typed history
+        self.history_shown = False
+
+    def show(self, text):
+        # Replace whatever is on the display, stopping any scrolling message
+        self.cancel()
+        if self.glyphs is None:
+            self.display.fill(0)
+            self.display.print(text)
+        else:
+            self.glyphs.show(text)
+        self.changed()
+
+    def show_history(self, history):
+        # Show the end of a TypedHistory, stopping any scrolling message.
+        # Without a glyph cache only the last character typed is shown.
+        self.cancel()
+        if self.glyphs is None:
+            self.display.fill(0)
+            if len(history):
+                self.display.print(chr(history.code(0)))
+        else:
+            self.glyphs.show_history(history)
+            self.history_shown = True
+        self.changed()
+
+    def history_typed(self, history, code):
+        # Show the character code just added to history. If the display
+        # is already showing the history it only has to move along a digit.
+        if not self.history_shown or history.count == 0:
+            self.show_history(history)
+            return
+        self.glyphs.push_code(code)
+        self.changed()
+
+    def show_after_scroll(self, text):
+        # Show text once the current message has finished scrolling
+        if self.text is None:
+            self.show(text)
+        else:
+            self.pending = text
+
+    def scroll(self, text):
+        # Start a message scrolling, replacing any message in progress
+        self.cancel()
+        if self.glyphs is None:
+            self.display.fill(0)
+        else:
+            self.glyphs.clear()
+        self.changed()
+        if len(text) == 0:
+            return
+        self.text = text
+        self.pos = 0
+        self.next_time = time.monotonic()
+
+    def update(self, now=None):
+        # Print the next marquee frame if it is due and send any change to
+        # the display. Returns True if the display was written.
+        written = self.step(now)
+        if self.frame is None:
+            return written
+        return self.frame.flush()
+
+    def step(self, now=None):
+        # Print the next marquee frame if it is due. Returns True if the
+        # display was changed.
+        if self.text is None:
+            return False
+        if now is None:
+            now = time.monotonic()
+        if now < self.next_time:
+            return False
+        if self.pos == len(self.text):
+            # the last frame has been on show for its full delay
+            pending = self.pending
+            self.cancel()
+            if pending is not None:
+                self.show(pending)
+                return True
+            return False
+        if self.glyphs is None:
+            self.display.print(self.text[self.pos])
+        else:
+            self.glyphs.push(self.text[self.pos])
+        self.changed()
+        self.pos = self.pos + 1
+        self.next_time = self.next_time + self.delay
+        if self.next_time < now:
+            # we have fallen behind, don't try to catch up
+            self.next_time = now + self.delay
+        return True
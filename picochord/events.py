@@ -0,0 +1,167 @@
+# Key event queue and chord assembly
+#
+# The scanner pushes timestamped key edges into a preallocated ring
+# buffer. A separate consumer drains the buffer, assembles chords and
+# hands them on, so a slow consumer never causes edges to be lost.
+#
+# Key edges are timestamped with ticks_ms() further down, which returns a
+# small int, so timing an edge never allocates.
+
+from array import array
+import time
+
+KEY_UP = 0
+KEY_DOWN = 1
+
+# Microsecond ticks that wrap, for the profilers. They are worked out
+# from time.monotonic_ns(), which allocates, so they are kept out of the
+# main loop.
+TICKS_MASK = 0x3FFFFFFF
+
+
+def ticks_us():
+    return (time.monotonic_ns() // 1000) & TICKS_MASK
+
+
+def ticks_diff(end, start):
+    return (end - start) & TICKS_MASK
+
+
+# Millisecond ticks for timing done on every pass of the main loop.
+# supervisor.ticks_ms() returns a small int so reading it never
+# allocates, unlike time.monotonic_ns().
+TICKS_MS_PERIOD = 1 << 29
+TICKS_MS_MASK = TICKS_MS_PERIOD - 1
+TICKS_MS_HALF = TICKS_MS_PERIOD // 2
+
+try:
+    from supervisor import ticks_ms
+except ImportError:
+    def ticks_ms():
+        return (time.monotonic_ns() // 1_000_000) & TICKS_MS_MASK
+
+
+def ticks_ms_add(ticks, delta):
+    return (ticks + delta) & TICKS_MS_MASK
+
+
+def ticks_ms_diff(end, start):
+    # signed difference, negative if end is before start
+    diff = (end - start) & TICKS_MS_MASK
+    if diff >= TICKS_MS_HALF:
+        diff = diff - TICKS_MS_PERIOD
+    return diff
+
+
+class EventQueue:
+
+    def __init__(self, size=32):
+        # size must be a power of two so that indices can be masked
+        if size & (size - 1):
+            raise ValueError("Event queue size must be a power of two")
+        self.size = size
+        self.index_mask = size - 1
+        self.masks = bytearray(size)
+        self.edges = bytearray(size)
+        self.times = array("L", [0] * size)
+        # head and tail only ever increase, the producer owns head and
+        # the consumer owns tail
+        self.head = 0
+        self.tail = 0
+        # overflow counters
+        self.dropped = 0
+        self.high_water = 0
+        # the most recent event taken from the queue
+        self.mask = 0
+        self.edge = KEY_UP
+        self.ticks = 0
+
+    def __len__(self):
+        return self.head - self.tail
+
+    def put(self, mask, edge, ticks):
+        count = self.head - self.tail
+        if count >= self.size:
+            self.dropped = self.dropped + 1
+            return False
+        pos = self.head & self.index_mask
+        self.masks[pos] = mask
+        self.edges[pos] = edge
+        self.times[pos] = ticks
+        self.head = self.head + 1
+        if count >= self.high_water:
+            self.high_water = count + 1
+        return True
+
+    def get(self):
+        # Take the oldest event from the queue into mask, edge and ticks.
+        # Returns False if the queue is empty.
+        if self.tail == self.head:
+            return False
+        pos = self.tail & self.index_mask
+        self.mask = self.masks[pos]
+        self.edge = self.edges[pos]
+        self.ticks = self.times[pos]
+        self.tail = self.tail + 1
+        return True
+
+    def clear(self):
+        self.tail = self.head
+
+
+class ChordAssembler:
+    # Builds chords from key events. A chord is complete on the first key
+    # release after a press, and the next chord starts once every key
+    # is back up. If the queue has dropped edges the assembler starts
+    # again from the keys held_keys() says are down, as a lost release
+    # would leave its key stuck down.
+
+    def __init__(self, queue, got_bits, held_keys=None):
+        self.queue = queue
+        self.got_bits = got_bits
+        self.held_keys = held_keys
+        # queue.dropped when the assembler last caught up with it
+        self.dropped = queue.dropped
+        # keys currently held down as seen by the consumer
+        self.bits = 0
+        self.assembling = False
+        # time of the first press of the chord being assembled
+        self.chord_ticks = 0
+
+    def key_down(self, mask, ticks):
+        if self.bits == 0:
+            # this is the first press of a new character
+            self.assembling = True
+            self.chord_ticks = ticks
+        self.bits = self.bits | mask
+
+    def key_up(self, mask, ticks):
+        bits = self.bits
+        self.bits = bits & ~mask
+        if self.assembling:
+            # This is the first key up - we have a char
+            self.assembling = False
+            self.got_bits(bits)
+
+    def process(self):
+        queue = self.queue
+        if queue.dropped != self.dropped:
+            self.resync()
+        while queue.get():
+            if queue.edge == KEY_DOWN:
+                self.key_down(queue.mask, queue.ticks)
+            else:
+                self.key_up(queue.mask, queue.ticks)
+
+    def reset(self):
+        self.queue.clear()
+        self.dropped = self.queue.dropped
+        self.bits = 0
+        self.assembling = False
+
+    def resync(self):
+        # Throw away the queued edges and take the keys held now as down,
+        # so no chord is made until they have all been released
+        self.reset()
+        if self.held_keys is not None:
+            self.bits = self.held_keys()
@@ -0,0 +1,112 @@
+# Heap allocation and garbage collection telemetry
+#
+# GcMonitor has the same interface as LoopProfiler but counts the bytes
+# allocated in each stage of the main loop rather than the time taken.
+# It also times the garbage collections the keyboard runs while idle and
+# counts the automatic ones, which show up as a drop in heap use.
+
+from array import array
+import gc
+
+from picochord.events import ticks_diff, ticks_ms, ticks_ms_diff, ticks_us
+
+try:
+    mem_alloc = gc.mem_alloc
+    # on the device the heap only shrinks when it is collected
+    SHRINK_MEANS_COLLECTION = True
+except AttributeError:
+    # CPython has no heap counter, tracemalloc gives the same figure.
+    # Memory is freed all the time by reference counting.
+    import tracemalloc
+    SHRINK_MEANS_COLLECTION = False
+
+    def mem_alloc():
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        return tracemalloc.get_traced_memory()[0]
+
+
+class GcMonitor:
+
+    def __init__(self, names, report_interval=0):
+        self.names = names
+        self.totals = array("L", [0] * len(names))
+        self.loops = 0
+        self.chords = 0
+        self.mark = mem_alloc()
+        # collections we ran, and ones that happened on their own
+        self.collections = 0
+        self.auto_collections = 0
+        self.total_pause_us = 0
+        self.max_pause_us = 0
+        # seconds between automatic reports, 0 for none
+        self.report_interval_ms = int(report_interval * 1000)
+        self.report_start = ticks_ms()
+
+    def start(self):
+        self.mark = mem_alloc()
+
+    def lap(self, stage):
+        now = mem_alloc()
+        allocated = now - self.mark
+        if allocated < 0:
+            if SHRINK_MEANS_COLLECTION:
+                # the heap shrank, so a collection ran during this stage
+                self.auto_collections = self.auto_collections + 1
+        else:
+            self.totals[stage] = self.totals[stage] + allocated
+        # measure from after our own call to mem_alloc
+        self.mark = mem_alloc()
+
+    def end(self):
+        self.loops = self.loops + 1
+        if self.report_interval_ms:
+            if ticks_ms_diff(ticks_ms(), self.report_start) >= self.report_interval_ms:
+                self.report()
+                self.reset()
+
+    def chord(self):
+        self.chords = self.chords + 1
+
+    def collect(self):
+        # Run a collection and time the pause
+        start = ticks_us()
+        gc.collect()
+        pause = ticks_diff(ticks_us(), start)
+        self.collections = self.collections + 1
+        self.total_pause_us = self.total_pause_us + pause
+        if pause > self.max_pause_us:
+            self.max_pause_us = pause
+        self.mark = mem_alloc()
+
+    def reset(self):
+        for stage in range(len(self.totals)):
+            self.totals[stage] = 0
+        self.loops = 0
+        self.chords = 0
+        self.collections = 0
+        self.auto_collections = 0
+        self.total_pause_us = 0
+        self.max_pause_us = 0
+        self.report_start = ticks_ms()
+
+    def report(self):
+        if self.loops == 0:
+            print("No loops measured")
+            return
+        total = 0
+        for stage_total in self.totals:
+            total = total + stage_total
+        print("Loops:", self.loops, "chords:", self.chords, "bytes allocated:", total)
+        print("Stage         bytes/loop  bytes/chord")
+        for stage in range(len(self.names)):
+            stage_total = self.totals[stage]
+            if self.chords:
+                per_chord = stage_total / self.chords
+            else:
+                per_chord = 0
+            print("{0:14}{1:10.1f}{2:12.1f}".format(self.names[stage],
+                stage_total / self.loops, per_chord))
+        print("Idle collections:", self.collections, "max pause (us):", self.max_pause_us,
+            "total pause (us):", self.total_pause_us)
+        print("Automatic collections:", self.auto_collections)
@@ -0,0 +1,142 @@
+# Segment patterns for the 14 segment display
+#
+# Seg14x4.print() works out the segments for each character as it is
+# printed and scrolls the display buffer along for every one. GlyphCache
+# asks the display for the pattern of each character once, at start up,
+# and then writes text straight into the display buffer, so showing a
+# character after a chord is a few byte stores. The buffer is the one
+# DisplayFrame sends, so the change goes out in a single write.
+#
+# Each digit is two bytes of display RAM, low byte first, after the RAM
+# address byte at the start of the buffer.
+
+from array import array
+
+# the decimal point segment of a pattern
+DECIMAL_POINT = 0x4000
+POINT_CODE = ord(".")
+
+
+class GlyphCache:
+
+    def __init__(self, display, digits=4):
+        self.display = display
+        self.buffer = display._buffer
+        self.digits = digits
+        # buffer position of the high byte of the right hand digit
+        self.last = digits * 2
+        self.blank = bytes(len(self.buffer) - 1)
+        # patterns for the ASCII characters, by character code. The keymap
+        # only types ASCII, so anything else is shown as a space.
+        self.ascii = array("H", [0] * 128)
+        saved = bytes(self.buffer)
+        for code in range(32, 127):
+            if code != ord("."):
+                self.ascii[code] = self.render_glyph(chr(code))
+        self.buffer[:] = saved
+
+    def render_glyph(self, ch):
+        # Get the pattern for ch from the display's own font
+        buffer = self.buffer
+        buffer[1] = 0
+        buffer[2] = 0
+        self.display._put(ch, 0)
+        return buffer[1] | (buffer[2] << 8)
+
+    def glyph(self, ch):
+        return self.glyph_code(ord(ch))
+
+    def glyph_code(self, code):
+        if code < 128:
+            return self.ascii[code]
+        return 0
+
+    def clear(self):
+        self.buffer[1:] = self.blank
+
+    def show(self, text):
+        # Put the end of text on the display, as fill(0) then print(text)
+        # would. The text is written from the right hand digit back.
+        buffer = self.buffer
+        buffer[1:] = self.blank
+        pos = self.digits * 2 - 1
+        point = 0
+        i = len(text)
+        while i > 0 and pos > 0:
+            i = i - 1
+            ch = text[i]
+            if ch == ".":
+                # lights the decimal point of the character before it
+                point = DECIMAL_POINT
+                continue
+            pattern = self.glyph(ch) | point
+            point = 0
+            buffer[pos] = pattern & 0xFF
+            buffer[pos + 1] = pattern >> 8
+            pos = pos - 2
+        if point and pos > 0:
+            # a point with nothing before it lights on a blank digit
+            buffer[pos + 1] = point >> 8
+
+    def show_history(self, history):
+        # Put the end of a TypedHistory on the display, the same way. The
+        # ring is read directly as this is done for every chord.
+        buffer = self.buffer
+        buffer[1:] = self.blank
+        ascii = self.ascii
+        codes = history.codes
+        size = history.size
+        slot = history.head
+        left = history.count
+        pos = self.digits * 2 - 1
+        point = 0
+        while pos > 0 and left > 0:
+            left = left - 1
+            slot = slot - 1
+            if slot < 0:
+                slot = size - 1
+            code = codes[slot]
+            if code == POINT_CODE:
+                point = DECIMAL_POINT
+                continue
+            if code < 128:
+                pattern = ascii[code] | point
+            else:
+                pattern = point
+            point = 0
+            buffer[pos] = pattern & 0xFF
+            buffer[pos + 1] = pattern >> 8
+            pos = pos - 2
+        if point and pos > 0:
+            # a point with nothing before it lights on a blank digit
+            buffer[pos + 1] = point >> 8
+
+    def push(self, ch):
+        # Scroll the display one digit left and put ch in the right hand
+        # digit, as print(ch) would
+        self.push_code(ord(ch))
+
+    def push_code(self, code):
+        buffer = self.buffer
+        last = self.last
+        if code == POINT_CODE:
+            buffer[last] = buffer[last] | (DECIMAL_POINT >> 8)
+            return
+        if last == 8:
+            # the usual four digits, moved without a loop as this is done
+            # for every character typed
+            buffer[1] = buffer[3]
+            buffer[2] = buffer[4]
+            buffer[3] = buffer[5]
+            buffer[4] = buffer[6]
+            buffer[5] = buffer[7]
+            buffer[6] = buffer[8]
+        else:
+            for pos in range(1, last - 1):
+                buffer[pos] = buffer[pos + 2]
+        if code < 128:
+            pattern = self.ascii[code]
+        else:
+            pattern = 0
+        buffer[last - 1] = pattern & 0xFF
+        buffer[last] = pattern >> 8
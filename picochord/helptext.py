@@ -0,0 +1,44 @@
+# Help text rendering
+#
+# The help is rendered once into a bytes object holding the ASCII text
+# to type, so that printing it only has to stream the bytes out.
+
+RULE = "-----------------------"
+
+
+def key_lines(bits, right_handed):
+    # Draw the chord as two lines of key boxes laid out like the keyboard
+    top = []
+    bottom = []
+    if right_handed:
+        top.append("        ")
+        order = (1, 2, 4, 8, 16, 32)
+    else:
+        bottom.append("                ")
+        order = (32, 16, 8, 4, 2, 1)
+    for bit in order:
+        if (bits & bit) == 0:
+            text = "[ ] "
+        else:
+            text = "[X] "
+        if bit < 4:
+            bottom.append(text)
+        else:
+            top.append(text)
+    return "".join(top), "".join(bottom)
+
+
+def render_help(sections, right_handed):
+    # sections is a sequence of (title, entries) where entries is a
+    # sequence of (label, bits) in the order they are to be printed
+    lines = []
+    for title, entries in sections:
+        lines.append(title)
+        for label, bits in entries:
+            top, bottom = key_lines(bits, right_handed)
+            lines.append(label)
+            lines.append(top)
+            lines.append(bottom)
+            lines.append(RULE)
+    lines.append("")
+    return "\n".join(lines).encode()
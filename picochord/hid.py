@@ -0,0 +1,89 @@
+# Batched keyboard report output
+#
+# Keyboard layouts send a press and a release report for every
+# character. The batch writer works out the (modifier, keycode) report
+# for each character from the layout table as it is sent, and only puts
+# a release between two characters when the host would otherwise miss a
+# key press.
+
+KEYBOARD_USAGE_PAGE = 0x01
+KEYBOARD_USAGE = 0x06
+
+# ASCII_TO_KEYCODE marks shifted characters with the top bit
+SHIFT_FLAG = 0x80
+LEFT_SHIFT_MODIFIER = 0x02
+
+
+def find_keyboard_device(devices):
+    for device in devices:
+        if device.usage_page == KEYBOARD_USAGE_PAGE and device.usage == KEYBOARD_USAGE:
+            return device
+    raise ValueError("Could not find a keyboard HID device")
+
+
+class HidBatchWriter:
+
+    def __init__(self, device, keycodes):
+        self.device = device
+        # the layout ASCII_TO_KEYCODE table
+        self.keycodes = keycodes
+        # one report buffer reused for every send
+        self.report = bytearray(8)
+        # the key currently held down by the last report
+        self.modifier = 0
+        self.keycode = 0
+        self.reports_sent = 0
+
+    def needs_release(self, modifier, keycode):
+        # The same key twice in a row must be released in between, and
+        # shift is not changed while a key is held
+        if self.keycode == 0:
+            return False
+        return keycode == self.keycode or modifier != self.modifier
+
+    def send_report(self, modifier, keycode):
+        report = self.report
+        report[0] = modifier
+        report[2] = keycode
+        self.device.send_report(report)
+        self.modifier = modifier
+        self.keycode = keycode
+        self.reports_sent = self.reports_sent + 1
+
+    def type_char(self, ch):
+        # Press the key for a character, leaving it held until the next
+        # character or release_all()
+        self.type_code(ord(ch))
+
+    def type_code(self, code):
+        # type_char() for an ASCII character code
+        if code >= len(self.keycodes):
+            return
+        code = self.keycodes[code]
+        if code == 0:
+            return
+        if code & SHIFT_FLAG:
+            modifier = LEFT_SHIFT_MODIFIER
+        else:
+            modifier = 0
+        keycode = code & ~SHIFT_FLAG
+        if self.needs_release(modifier, keycode):
+            self.send_report(0, 0)
+        self.send_report(modifier, keycode)
+
+    def type_codes(self, buffer, start, end):
+        # Type the ASCII characters in buffer from start up to end
+        for pos in range(start, end):
+            self.type_code(buffer[pos])
+
+    def tap_key(self, keycode, count=1):
+        # Press and release a key count times, with no modifier
+        for _ in range(count):
+            if self.needs_release(0, keycode):
+                self.send_report(0, 0)
+            self.send_report(0, keycode)
+        self.release_all()
+
+    def release_all(self):
+        if self.keycode != 0 or self.modifier != 0:
+            self.send_report(0, 0)
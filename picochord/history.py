@@ -0,0 +1,65 @@
+# Recent typed text for the display
+#
+# The display only has room for four characters, so rather than show
+# just the last character typed it shows the end of what has been typed.
+# TypedHistory keeps the character codes of the recent output in a fixed
+# size ring, so typing and backspacing change a slot or two and make no
+# new objects. It holds more than the display shows so that backspacing
+# brings back the characters before.
+
+from array import array
+
+
+class TypedHistory:
+
+    def __init__(self, size=32):
+        self.size = size
+        # 32 bit slots so that any character code fits
+        self.codes = array("L", [0] * size)
+        # the slot for the next character and the number of characters held
+        self.head = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+
+    def add_code(self, code):
+        if code == 10 or code == 13:
+            # a new line starts the history again
+            self.clear()
+            return
+        head = self.head
+        self.codes[head] = code
+        head = head + 1
+        if head == self.size:
+            head = 0
+        self.head = head
+        if self.count < self.size:
+            self.count = self.count + 1
+
+    def add(self, text):
+        for ch in text:
+            self.add_code(ord(ch))
+
+    def add_codes(self, data, start, end):
+        # add the characters in a slice of a bytes object, such as a macro
+        # expansion, without copying it
+        for pos in range(start, end):
+            self.add_code(data[pos])
+
+    def backspace(self, count=1):
+        if count > self.count:
+            count = self.count
+        self.head = (self.head - count) % self.size
+        self.count = self.count - count
+
+    def code(self, back):
+        # The code of the character back places from the end, 0 being the
+        # last one typed, or -1 if it isn't held
+        if back >= self.count:
+            return -1
+        return self.codes[(self.head - 1 - back) % self.size]
@@ -0,0 +1,1150 @@
+# PICO Chord keyboard
+#
+# The keyboard program. code.py runs main() and the settings are in
+# picochord/settings.py.
+
+import board
+import busio
+import gc
+import time
+from digitalio import DigitalInOut, Direction, Pull
+import neopixel
+import usb_hid
+from adafruit_hid.keyboard import Keyboard
+# Import the keyboard layout description
+from adafruit_hid.keyboard_layout_uk import KeyboardLayoutUK
+
+from adafruit_hid.keycode import Keycode
+from adafruit_ht16k33 import segments
+try:
+    from microcontroller import nvm
+except ImportError:
+    nvm = None
+
+from picochord.boottime import BootTimer
+from picochord.charindex import build_char_index
+from picochord.debounce import TunedScanner, load_intervals, save_intervals
+from picochord.dispatch import compile_state_tables, table_decode
+from picochord.display import DisplayFrame, DisplayScheduler
+from picochord.events import ChordAssembler, EventQueue, KEY_DOWN, KEY_UP, ticks_ms, ticks_ms_diff
+from picochord.gcstats import GcMonitor
+from picochord.glyphs import GlyphCache
+from picochord.helptext import render_help
+from picochord.hid import HidBatchWriter, find_keyboard_device
+from picochord.history import TypedHistory
+from picochord.keymapfile import load_keymap
+from picochord.latency import LatencyMonitor
+from picochord.macros import load_macros
+from picochord.pixels import PixelFrame
+from picochord.predict import NgramPredictor
+from picochord.profiler import LoopProfiler
+from picochord.rollover import RolloverAssembler
+from picochord.scanner import ChordScanner, PinBank
+# the settings are kept in a file of their own so they can be changed
+# without rebuilding the compiled modules
+from picochord.settings import *
+
+version = "1.1"
+
+class Col:
+    
+    RED = (255, 0, 0)
+    YELLOW = (255, 150, 0)
+    GREEN = (0, 255, 0)
+    CYAN = (0, 255, 255)
+    BLUE = (0, 0, 255)
+    MAGENTA = (255, 0, 255)
+    WHITE = (255, 255, 255)
+    BLACK = (0, 0, 0)
+    GREY = (10, 10, 10)
+    VIOLET = (127,0,155)
+    INDIGO = (75,0,130)
+    ORANGE = (255,165,0)
+       
+    values=(RED, GREEN, BLUE, YELLOW, MAGENTA, CYAN, GREY, WHITE)
+    
+    names={ RED:"Red", YELLOW:"Yellow", GREEN:"Green", CYAN:"Cyan",
+            BLUE:"Blue", MAGENTA:"Magenta", WHITE:"White",BLACK:"Black",
+            GREY:"Grey",VIOLET:"Violet",INDIGO:"Indigo",ORANGE:"Orange"}
+
+class Switch:
+    def __init__(self, pin, pixel, bit)  :
+        self.pin = pin
+        self.pixel = pixel
+        self.bit = bit
+
+class Key():
+    def __init__(self, keyboard, switch): 
+        self.keyboard = keyboard
+        self.pixel = switch.pixel
+        self.bit = switch.bit
+        # the keyboard scanner has already sampled the switches
+        self.pressed = (keyboard.scanner.state & self.bit) != 0
+        self.down_col=Col.RED
+        self.up_col=Col.BLUE
+        self.guide_key_col=Col.GREY
+        self.guide_key=False
+
+    def update(self):
+        if(self.pressed):
+            col = self.down_col
+        else:
+            if self.guide_key:
+                col = self.guide_key_col
+            else:
+                col = self.up_col
+        self.set_col(col)
+            
+    def set_col(self,col):
+        self.keyboard.pixels[self.pixel] = col
+            
+    # Chords are assembled from the keyboard event queue, the key
+    # only needs to know whether it is down to pick its colour
+    def key_down(self):
+        self.pressed = True
+    
+    def key_up(self):
+        self.pressed = False
+            
+class Processor:
+
+    def __init__(self, keyboard): 
+        self.keys = keyboard
+
+class TextProcessor(Processor):
+
+    def __init__(self, keyboard): 
+        super(TextProcessor,self).__init__(keyboard)
+
+    def start(self):
+        # let any message finish scrolling before clearing the display
+        self.keys.history.clear()
+        self.keys.display_scheduler.show_after_scroll("")
+        self.keys.start_lower_case_text()
+
+    def key_pressed(self,key):
+        if DEBUG:
+            print("Key pressed text:", key)
+        if self.expand_macro(key):
+            self.keys.display_typed()
+        else:
+            self.keys.type_text(key)
+            self.keys.add_typed(key)
+        predictor = self.keys.predictor
+        if predictor is not None:
+            if len(key) == 1:
+                predictor.typed(key)
+            else:
+                predictor.reset()
+            self.keys.display_prediction(predictor.predict())
+
+    def expand_macro(self,key):
+        # Returns True if key ends an abbreviation, which is replaced by
+        # its expansion
+        macros = self.keys.macros
+        if macros is None:
+            return False
+        if len(key) != 1:
+            macros.reset()
+            return False
+        expansion = macros.typed(key)
+        if expansion < 0:
+            return False
+        self.keys.type_macro(expansion, key)
+        return True
+        
+    def update(self):
+        pass
+
+class HelpProcessor(Processor):
+
+    def __init__(self, keyboard): 
+        super(HelpProcessor,self).__init__(keyboard)
+
+    def start(self):
+        print("Start help")
+        self.keys.set_keyboard_state(PicoChord.LOWER_CASE_KEYS)
+        self.keys.clear_all_keys()
+        self.keys.pixels.show()        
+        self.keys.scroll_text("Printing help. Hold any key to stop")
+        self.mode=PicoChord.HELP_MODE
+        self.text_waiting_for_clear_keys = True
+        self.test_count=0
+        
+    def key_pressed(self,key):
+        if DEBUG:
+            print("Key pressed help:", key)
+        self.keys.chord_sent()
+
+    def print_stop_check(self):
+        # the keys are scanned between each step of the help output
+        if self.keys.scanner.any_down():
+            return True
+
+    def print_help(self):
+        # output job that types the help a chunk at a time
+        stream = self.keys.stream_text(self.keys.help_text)
+        for _ in stream:
+            if self.print_stop_check():
+                stream.close()
+                break
+            yield
+        self.keys.scroll_text("Help complete")
+        self.keys.set_keyboard_state(PicoChord.LOWER_CASE_KEYS)
+        self.keys.clear_all_keys()
+        self.keys.clear_keyboard_guides()
+        self.keys.start_mode(PicoChord.TEXT_MODE)
+        self.keys.pixels.show()        
+
+    def update(self):
+        if self.text_waiting_for_clear_keys:
+            if self.keys.character_bits == 0 and not self.keys.display_scheduler.busy:
+                # all the keys are up and the message has been shown,
+                # we can start the output
+                self.text_waiting_for_clear_keys = False
+                self.keys.start_output_job(self.print_help())
+
+class GameProcessor(Processor):
+
+    def __init__(self, keyboard, test_texts): 
+        super(GameProcessor,self).__init__(keyboard)
+        self.keys.game_help_displayed = False
+        self.test_texts = test_texts
+
+    def get_test_char(self):
+        test_string = self.test_texts[self.game_test_strings_pos]
+        return test_string[self.game_txt_pos]
+    
+    def game_step_start(self):
+        ch = self.get_test_char()
+        self.keys.display_text(ch)
+        self.game_step_start_time = time.monotonic()
+        self.game_help_display_time = self.game_step_start_time + self.game_display_time
+        self.keys.clear_keyboard_guides()
+        self.keys.game_help_displayed = False
+        
+    def game_step_advance_char(self):
+        test_string = self.test_texts[self.game_test_strings_pos]
+        self.game_txt_pos = self.game_txt_pos + 1
+        if self.game_txt_pos == len(test_string):
+            self.game_txt_pos = 0
+            self.game_test_strings_pos = self.game_test_strings_pos + 1
+            if self.game_test_strings_pos == len(self.test_texts):
+                self.game_test_strings_pos = 0
+
+    def start(self):
+        print("Start game")
+        self.keys.set_keyboard_state(PicoChord.LOWER_CASE_KEYS)
+        self.keys.clear_all_keys()
+        self.keys.pixels.show()        
+        self.keys.scroll_text("Game starting.....")
+        self.keys.mode=PicoChord.GAME_MODE
+        self.game_display_time = 1.0
+        self.game_txt_pos = 0
+        self.game_test_strings_pos = 0
+        self.game_score = 0
+        self.game_waiting_for_clear_keys = True
+        
+    def key_pressed(self,key):
+        if DEBUG:
+            print("Key pressed game:", key)
+        if key == self.get_test_char():
+            if self.keys.game_help_displayed:
+                self.game_score = self.game_score + 1
+            else:
+                self.game_score = self.game_score + 5
+            self.game_step_advance_char()
+            self.game_step_start()
+        else:
+            score_message = "Game over score " + str(self.game_score)
+            # the score keeps scrolling after we go back to text mode
+            self.keys.scroll_text(score_message)
+            self.keys.clear_keyboard_guides()
+            self.keys.start_mode(PicoChord.TEXT_MODE)
+        self.keys.chord_sent()
+
+    def update(self):
+        if self.game_waiting_for_clear_keys:
+            if self.keys.character_bits == 0 and not self.keys.display_scheduler.busy:
+                # all the keys are up and the message has been shown,
+                # we can start the game
+                self.game_step_start()
+                self.game_waiting_for_clear_keys = False
+        else:
+            current_time = time.monotonic()
+            if not self.keys.game_help_displayed:
+                if current_time > self.game_help_display_time:
+                    self.keys.display_guide(self.get_test_char())
+                    self.keys.game_help_displayed = True
+
+class CalibrateProcessor(Processor):
+    # Times the bounce of each key switch. Once every key has been pressed
+    # CALIBRATION_PRESSES times the debounce times are saved and the
+    # keyboard goes back to text mode.
+
+    def __init__(self, keyboard): 
+        super(CalibrateProcessor,self).__init__(keyboard)
+
+    def start(self):
+        print("Start calibration")
+        self.keys.set_keyboard_state(PicoChord.LOWER_CASE_KEYS)
+        self.keys.clear_all_keys()
+        self.keys.scroll_text("Calibrating. Press each key " + str(CALIBRATION_PRESSES) + " times")
+        self.calibration_waiting_for_clear_keys = True
+
+    def key_pressed(self,key):
+        if DEBUG:
+            print("Key pressed calibrate:", key)
+        self.keys.chord_sent()
+
+    def update(self):
+        if self.calibration_waiting_for_clear_keys:
+            if self.keys.character_bits == 0:
+                # the keys are all up, we can start timing them
+                self.calibration_waiting_for_clear_keys = False
+                self.keys.start_calibration()
+        elif self.keys.character_bits == 0 and self.keys.scanner.calibrated(CALIBRATION_PRESSES):
+            intervals = self.keys.finish_calibration()
+            message = "Debounce"
+            for interval in intervals:
+                message = message + " " + str(interval)
+            print(message + " ms")
+            self.keys.scroll_text(message)
+            self.keys.start_mode(PicoChord.TEXT_MODE)
+
+class PicoChord:
+    
+    UPPER_CASE_KEYS=0
+    LOWER_CASE_KEYS=1
+    NUMBER_KEYS=2
+    SYMBOL_KEYS=3
+
+    keyboard_state_cols = {
+        UPPER_CASE_KEYS:Col.YELLOW,
+        LOWER_CASE_KEYS:Col.BLUE,
+        NUMBER_KEYS:Col.GREEN,
+        SYMBOL_KEYS:Col.MAGENTA}
+
+    def set_keyboard_state(self,state):
+        self.keyboard_state = state
+        new_state_col = PicoChord.keyboard_state_cols[self.keyboard_state]
+        for key in self.keys:
+            key.up_col = new_state_col 
+        return
+        
+    def get_keyboard_col(self):
+        return PicoChord.keyboard_state_cols[self.keyboard_state]
+        
+    def do_toggle_caps_lock(self):
+        print("Caps lock toggle",self.mode)
+        if self.keyboard_state == PicoChord.UPPER_CASE_KEYS:
+            self.set_keyboard_state(PicoChord.LOWER_CASE_KEYS)
+            return
+        if self.keyboard_state == PicoChord.LOWER_CASE_KEYS:
+            self.set_keyboard_state(PicoChord.UPPER_CASE_KEYS)
+            return
+
+    def display_text(self, text):
+        self.display_scheduler.show(text)
+        
+    def display_typed(self):
+        # show the end of the text typed so far
+        self.display_scheduler.show_history(self.history)
+
+    def add_typed(self, text):
+        # add typed text to the history and show it, a single character
+        # without redrawing the display
+        if len(text) == 1:
+            code = ord(text)
+            self.history.add_code(code)
+            self.display_scheduler.history_typed(self.history, code)
+        else:
+            self.history.add(text)
+            self.display_typed()
+
+    def scroll_text(self,text):
+        # the message is scrolled a frame at a time by update()
+        self.display_scheduler.scroll(text)
+        
+    TEXT_MODE = 0
+    HELP_MODE = 1
+    GAME_MODE = 2
+    CALIBRATE_MODE = 3
+
+    # text behaviours
+
+    def start_lower_case_text(self):
+        print("Start lower case text")
+        self.set_keyboard_state(PicoChord.LOWER_CASE_KEYS)
+
+    def start_upper_case_text(self):
+        print("Start upper case text")
+        self.set_keyboard_state(PicoChord.UPPER_CASE_KEYS)
+
+    def start_number_text(self):
+        print("Start number text")
+        self.set_keyboard_state(PicoChord.NUMBER_KEYS)
+
+    def start_symbol_text(self):
+        print("Start symbol text")
+        self.set_keyboard_state(PicoChord.SYMBOL_KEYS)
+
+    test_texts = (
+        "abcdefghijklmnopqrstuvwxyz",
+        "the quick brown fox jumps over the lazy dog",
+        "Jackdaws love my big sphinx of quartz.",
+        "The five boxing wizards jump quickly.",
+        "A Capital Idea",
+        "1234567890",
+        "I am 21 years old",
+        "if a<b print(\"hello\")"
+        )
+
+    # Perform a command from the command table
+    def run_command(self,command):
+        name = command[0]
+        function = command[1]
+        if DEBUG:
+            print("Control:",name)
+        function(self)
+        if not self.output:
+            # the command didn't queue any output
+            self.chord_sent()
+
+    def got_bits(self, bits):
+        # got a bit pattern - need to act on the bits
+        if self.latency is not None:
+            # the chord started with the first key down and was completed
+            # by the key up event being processed now
+            self.latency.chord_decoded(self.chords.chord_ticks, self.events.ticks)
+        self.act_on_chord(bits)
+
+    def act_on_chord(self, bits):
+        if DEBUG:
+            print("Bits:",bits)
+        # a chord has been made, collect the garbage when next idle
+        self.heap_clean = False
+        if self.profiler is not None:
+            self.profiler.chord()
+        # the compiled table for this state gives the character or
+        # command for the chord directly
+        if self.mode == PicoChord.CALIBRATE_MODE:
+            # the chords are only being used to time the switches
+            self.calibrate_proc.key_pressed(bits)
+            return
+        entry = self.chord_tables[self.keyboard_state][bits]
+        if entry is None:
+            return
+        if type(entry) is not str:
+            # Got a control code
+            self.run_command(entry)
+            return
+        processor = self.mode_processors[self.mode]
+        processor.key_pressed(entry)   
+
+    def clear_keyboard_guides(self):
+        for key in self.keys:
+            key.guide_key=False
+
+    def clear_all_keys(self):
+        for key in self.keys:
+            col = PicoChord.keyboard_state_cols[self.keyboard_state]
+            key.set_col(col)
+        self.pixels.show()
+
+    def display_guide(self, ch): 
+        char_def = self.lookup_character(ch)
+        if char_def == None:
+            return
+        up_col = self.keyboard_state_cols[char_def[1]]
+        pattern = char_def[2]
+        for key in self.keys:
+            key.up_col = up_col
+            key.guide_key = pattern[key.pixel]
+        
+    def display_keypress(self, char_def, col): 
+        up_col = self.keyboard_state_cols[char_def[1]]
+        for key in self.keys:
+            key.up_col = up_col
+        self.pixels.write_pattern(char_def[2], col, up_col)
+
+    def display_char_on_keyboard(self,ch, pressed_col):
+        char_def = self.lookup_character(ch)
+        if char_def != None:
+            if DEBUG:
+                print('Displaying:',ch,char_def[0])
+            self.display_keypress(char_def, pressed_col)
+        
+    def stream_text(self, text, chunk_size=None):
+        # Generator that types the ASCII bytes in text, yielding after each
+        # chunk. The characters are shown on the keys and display at the
+        # animation rate, however fast the host takes the reports. Unless
+        # chunk_size is given, output_chunk_size is looked up for each
+        # chunk so that it can be changed while the text is typed.
+        old_state = self.keyboard_state
+        writer = self.hid_writer
+        next_frame_time = 0
+        pos = 0
+        length = len(text)
+        try:
+            while pos < length:
+                if chunk_size is None:
+                    end = pos + self.output_chunk_size
+                else:
+                    end = pos + chunk_size
+                if end > length:
+                    end = length
+                now = time.monotonic()
+                if now >= next_frame_time:
+                    ch = chr(text[pos])
+                    self.display_text(ch)
+                    self.display_char_on_keyboard(ch,self.key_down_col)
+                    self.pixels.show()
+                    next_frame_time = now + ANIMATION_FRAME_TIME
+                writer.type_codes(text, pos, end)
+                pos = end
+                yield pos
+        finally:
+            writer.release_all()
+            self.display_text("")
+            self.set_keyboard_state(old_state)
+
+    def help_sections(self):
+        # The help contents as (title, [(label, bits)...]) sections
+        sections = []
+        for title, decode in (("Text", self.text_decode),
+                ("Numbers", self.num_decode), ("Symbols", self.sym_decode)):
+            entries = []
+            for bits in decode:
+                entries.append((decode[bits], bits))
+            entries.sort()
+            sections.append((title, entries))
+        entries = []
+        table = self.chord_tables[PicoChord.LOWER_CASE_KEYS]
+        for bits in range(len(table)):
+            command = table[bits]
+            if command is not None and type(command) is not str:
+                entries.append((command[0] + " : " + command[2], bits))
+        entries.sort()
+        sections.append(("Control", entries))
+        return sections
+
+    def load_chord_tables(self):
+        # One 64 entry table per state, from the keymap file if there is
+        # one, or compiled from the built in decodes and commands
+        commands = {}
+        for command in self.command_actions.values():
+            commands[command[0]] = command
+        try:
+            return load_keymap(KEYMAP_FILE, commands, self.key_command)
+        except OSError:
+            pass
+        except ValueError as e:
+            print("Keymap file not used:", e)
+        from picochord import keymap
+        #                         upper             lower            numbers          symbols
+        state_decodes = (keymap.TEXT_DECODE, keymap.TEXT_DECODE, keymap.NUM_DECODE, keymap.SYM_DECODE)
+        return compile_state_tables(state_decodes, self.command_actions,
+            PicoChord.UPPER_CASE_KEYS)
+
+    def key_command(self, code):
+        # command tuple for a chord that sends a keycode
+        return ("key", lambda x:self.send_key(code), "Send keycode " + str(code))
+
+    def build_char_index(self):
+        # upper case text is typed with the text chords in the upper case state
+        self.char_index = build_char_index((
+            (self.text_decode, PicoChord.LOWER_CASE_KEYS, PicoChord.UPPER_CASE_KEYS),
+            (self.num_decode, PicoChord.NUMBER_KEYS, None),
+            (self.sym_decode, PicoChord.SYMBOL_KEYS, None)), self.keys)
+
+    # Returns (bits, state, pattern) for the chord that types ch,
+    # or None if there isn't one
+    def lookup_character(self,ch):
+        code = ord(ch)
+        if code < len(self.char_index):
+            return self.char_index[code]
+        return None
+        
+    def get_command(self,name, commands):
+        self.send_text_to_keyboard(name)
+        key_no = 0
+        command_keys = []
+        self.pixels.fill(Col.BLACK)
+        for command in commands:
+            col = command[0]
+            text = command[1]
+            self.send_text_to_keyboard(Col.names[col]+' : '+text)
+            key = self.keys[key_no]
+            self.pixels[key.pixel]=col
+            key_no = key_no+1
+        self.pixels.show()
+        self.wait_for_all_keys_up()
+        scanner = self.scanner
+        while True:
+            if scanner.update():
+                for pos in range(0,key_no):
+                    key = self.keys[pos]
+                    if scanner.pressed & key.bit:
+                        return commands[pos][0]
+        
+    # Keyboard output is queued and sent from the main loop, or by the
+    # output task when running under asyncio
+
+    def type_text(self, text):
+        self.output.append(text)
+
+    def send_key(self, keycode):
+        self.output.append(keycode)
+
+    def move_cursor(self, keycode):
+        # the macros don't know what word the cursor has moved to
+        if self.macros is not None:
+            self.macros.reset()
+        self.forget_prediction()
+        # nor does the display
+        self.history.clear()
+        if self.mode == PicoChord.TEXT_MODE:
+            self.display_typed()
+        self.send_key(keycode)
+
+    def delete_char(self):
+        if self.macros is not None:
+            self.macros.backspace()
+        self.forget_prediction()
+        self.history.backspace()
+        if self.mode == PicoChord.TEXT_MODE:
+            self.display_typed()
+        self.send_key(Keycode.BACKSPACE)
+
+    def forget_prediction(self):
+        if self.predictor is not None:
+            self.predictor.reset()
+            self.clear_keyboard_guides()
+
+    def start_prediction(self):
+        self.predictor = NgramPredictor()
+        try:
+            self.predictor.load(PREDICT_FILE)
+        except OSError:
+            pass
+        except ValueError as e:
+            print("Prediction model not used:", e)
+            self.predictor = NgramPredictor()
+
+    def toggle_prediction(self):
+        if self.predictor is None:
+            print("Prediction started")
+            self.start_prediction()
+            return
+        print("Prediction stopped")
+        self.predictor = None
+        self.clear_keyboard_guides()
+
+    def display_prediction(self, code):
+        # light the chord for the character code as a guide, keeping the
+        # colours of the current state
+        char_def = None
+        if code >= 0 and self.keyboard_state <= PicoChord.LOWER_CASE_KEYS:
+            char_def = self.char_index[code]
+        if char_def is None:
+            self.clear_keyboard_guides()
+            return
+        pattern = char_def[2]
+        for key in self.keys:
+            key.guide_key = pattern[key.pixel]
+
+    def type_macro(self, expansion, terminator):
+        # the trigger has been typed already, the terminator hasn't
+        start, end = self.macros.expansion(expansion)
+        self.output.append((self.macros.trigger_length, start, end, terminator))
+        history = self.history
+        history.backspace(self.macros.trigger_length)
+        history.add_codes(self.macros.data, start, end)
+        history.add(terminator)
+
+    def send_macro(self, item):
+        # Rub out the trigger and type the expansion and the character
+        # that ended the trigger
+        backspaces, start, end, terminator = item
+        writer = self.hid_writer
+        writer.tap_key(Keycode.BACKSPACE, backspaces)
+        writer.type_codes(self.macros.data, start, end)
+        writer.type_char(terminator)
+        writer.release_all()
+
+    def start_output_job(self, job):
+        # job is a generator that is stepped once per flush until it ends
+        self.output_job = job
+
+    def output_waiting(self):
+        return len(self.output) > 0 or self.output_job is not None
+
+    def flush_output(self):
+        # send everything queued, then take one step of the output job
+        output = self.output
+        while output:
+            item = output.pop(0)
+            if type(item) is str:
+                self.usb_layout.write(item)
+            elif type(item) is tuple:
+                self.send_macro(item)
+            else:
+                self.usb_kbd.send(item)
+            self.chord_sent()
+        if self.output_job is not None:
+            try:
+                next(self.output_job)
+            except StopIteration:
+                self.output_job = None
+
+    def chord_sent(self):
+        # called when the output for a chord has gone
+        if self.latency is not None:
+            self.latency.chord_sent()
+
+    def show_latency(self):
+        if self.latency is None:
+            print("Latency recording started")
+            self.latency = LatencyMonitor()
+            return
+        self.latency.report()
+
+    def toggle_profiler(self):
+        if isinstance(self.profiler, LoopProfiler):
+            self.profiler.report()
+            self.profiler = None
+            return
+        # this replaces memory use reporting if it is running
+        print("Loop profiling started")
+        self.profiler = LoopProfiler(PicoChord.PROFILE_STAGES)
+
+    def toggle_gc_monitor(self):
+        if isinstance(self.profiler, GcMonitor):
+            self.profiler.report()
+            self.profiler = None
+            return
+        # this replaces loop profiling if it is running
+        print("Memory use reporting started")
+        self.profiler = GcMonitor(PicoChord.PROFILE_STAGES)
+
+    def collect_garbage(self):
+        if isinstance(self.profiler, GcMonitor):
+            # time the collection
+            self.profiler.collect()
+        else:
+            gc.collect()
+        self.heap_clean = True
+
+    def start_mode(self,mode):
+        self.mode = mode
+        processor = self.mode_processors[self.mode]
+        processor.start()
+
+    def handle_text_control(self):
+        # If we are in game mode we are using
+        # the text command to switch to text symbol types
+        if self.mode == PicoChord.GAME_MODE:
+            self.start_lower_case_text()
+        else:
+            self.start_mode(PicoChord.TEXT_MODE)
+
+    def __init__(self,i2c_sda,i2c_scl,pixel_pin,key_switches):
+        hello_message = "PICO Chord " + str(version)
+        print(hello_message)
+        self.key_down_col = Col.RED
+        # start the pixels and turn them all black
+        # the pixels are only written when the frame changes
+        self.pixels = PixelFrame(neopixel.NeoPixel(pixel_pin,6,auto_write=False),
+            6, max_rate=PIXEL_REFRESH_HZ)
+        self.pixels.fill(Col.BLUE)
+        self.pixels.show()
+        #
+        self.usb_kbd = Keyboard(usb_hid.devices)
+        # Set the required keyboard layout
+        self.usb_layout = KeyboardLayoutUK(self.usb_kbd)
+        self.output = []
+        self.output_job = None
+        # characters typed by each step of the output job
+        self.output_chunk_size = HELP_CHUNK_SIZE
+        # Multi-character output goes straight to the keyboard device
+        self.hid_writer = HidBatchWriter(find_keyboard_device(usb_hid.devices),
+            KeyboardLayoutUK.ASCII_TO_KEYCODE)
+        try:
+            self.macros = load_macros(MACRO_FILE)
+        except ValueError as e:
+            print("Macro file not used:", e)
+            self.macros = None
+        self.predictor = None
+        if PREDICT:
+            self.start_prediction()
+        #
+        # Make i2c connection
+        self.i2c = busio.I2C(i2c_scl, i2c_sda)
+        # Make display. Changes go into the display buffer and the frame
+        # sends them from the main loop in a single write.
+        self.display = segments.Seg14x4(self.i2c, auto_write=False)
+        self.display_frame = DisplayFrame(self.display)
+        # text is written into the buffer from segment patterns made once
+        self.glyphs = GlyphCache(self.display)
+        self.display_scheduler = DisplayScheduler(self.display, delay=0.25,
+            frame=self.display_frame, glyphs=self.glyphs)
+        # the end of the typed text is shown as it is typed
+        self.history = TypedHistory()
+        self.scroll_text(hello_message)
+        self.key_switches = key_switches
+        self.load_debounce_intervals()
+        self.scanner = self.make_scanner(key_switches)
+        # Key edges are queued by the scanner and assembled into chords
+        # by a separate stage
+        self.events = EventQueue(32)
+        if ROLLOVER_TIME > 0:
+            self.chords = RolloverAssembler(self.events, self.got_bits,
+                                            window=ROLLOVER_TIME,
+                                            key_count=len(key_switches),
+                                            held_keys=self.held_keys)
+        else:
+            self.chords = ChordAssembler(self.events, self.got_bits,
+                                         held_keys=self.held_keys)
+        if LATENCY_STATS:
+            self.latency = LatencyMonitor()
+        else:
+            self.latency = None
+        if PROFILE_LOOP:
+            self.profiler = LoopProfiler(PicoChord.PROFILE_STAGES, PROFILE_REPORT_TIME)
+        elif GC_STATS:
+            self.profiler = GcMonitor(PicoChord.PROFILE_STAGES, PROFILE_REPORT_TIME)
+        else:
+            self.profiler = None
+        self.heap_clean = False
+        # the scan side when it runs on a core of its own
+        self.split = None
+        # Create the array of keys
+        self.keys = []
+        # going to use a mask bit for each key to assemble a key pattern
+        for switch in key_switches:
+            # Make the key
+            key = Key(keyboard=self,switch=switch)
+            # add it to the list of keys
+            self.keys.append(key)
+
+        self.command_actions = {
+            1: ("caps", lambda x:self.do_toggle_caps_lock(),"Toggle CAPS lock"),
+            13:("del", lambda x:self.delete_char(),"Backspace and delete"),
+            17:("sym", lambda x:self.set_keyboard_state(PicoChord.SYMBOL_KEYS),"Set symbol mode (magenta)"),
+            21:("text", lambda x:self.handle_text_control(),"Set text mode (blue)"),
+            25:("num", lambda x:self.start_number_text(),"Set numeric mode (green)"),
+            29:("for", lambda x:self.move_cursor(Keycode.RIGHT_ARROW),"Move cursor right"),
+            44:("ret", lambda x:self.move_cursor(Keycode.ENTER),"Enter key"),
+            57:("bak", lambda x:self.move_cursor(Keycode.LEFT_ARROW),"Move cursor left"),
+            33:("Help", lambda x:self.start_mode(PicoChord.HELP_MODE), "Type help information"),
+            49:("Game", lambda x:self.start_mode(PicoChord.GAME_MODE), "Start the game"),
+            3:("lat", lambda x:self.show_latency(), "Print chord latency figures"),
+            5:("prof", lambda x:self.toggle_profiler(), "Start or stop loop profiling"),
+            7:("mem", lambda x:self.toggle_gc_monitor(), "Start or stop memory use reporting"),
+            9:("cal", lambda x:self.start_mode(PicoChord.CALIBRATE_MODE), "Calibrate the key debounce times"),
+            11:("pred", lambda x:self.toggle_prediction(), "Start or stop next character guides")
+            }
+
+        self.chord_tables = self.load_chord_tables()
+        # the characters for the help and the guides come from the tables
+        self.text_decode = table_decode(self.chord_tables[PicoChord.LOWER_CASE_KEYS])
+        self.num_decode = table_decode(self.chord_tables[PicoChord.NUMBER_KEYS])
+        self.sym_decode = table_decode(self.chord_tables[PicoChord.SYMBOL_KEYS])
+        self.build_char_index()
+        # The help is typed from text rendered once here
+        self.help_text = render_help(self.help_sections(), RIGHT_HANDED)
+
+        test_texts = (
+            "abcdefghijklmnopqrstuvwxyz",
+            "the quick brown fox jumps over the lazy dog",
+            "Jackdaws love my big sphinx of quartz.",
+            "The five boxing wizards jump quickly.",
+            "A Capital Idea",
+            "1234567890",
+            "I am 21 years old",
+            "if a<b print(\"hello\")"
+            )
+
+        self.game_proc = GameProcessor(self,test_texts)
+        self.text_proc = TextProcessor(self)
+        self.help_proc = HelpProcessor(self)
+        self.calibrate_proc = CalibrateProcessor(self)
+
+        self.mode_processors = {
+                PicoChord.TEXT_MODE:self.text_proc,
+                PicoChord.HELP_MODE:self.help_proc,
+                PicoChord.GAME_MODE:self.game_proc,
+                PicoChord.CALIBRATE_MODE:self.calibrate_proc
+        }
+        
+        self.wait_for_all_keys_up()
+        self.mode = PicoChord.TEXT_MODE
+        self.start_mode(PicoChord.TEXT_MODE)
+
+        self.pixels.show()
+        
+    def load_debounce_intervals(self):
+        # the debounce time of each key in milliseconds, by bit number
+        count = len(self.key_switches)
+        intervals = load_intervals(nvm, count, NVM_DEBOUNCE)
+        self.debounce_calibrated = intervals is not None
+        if intervals is None:
+            intervals = bytes([int(DEBOUNCE_TIME * 1000)] * count)
+        self.debounce_intervals = intervals
+
+    def make_scanner(self, key_switches, poll=False):
+        # keypad has one debounce time for all the keys, so once they have
+        # been calibrated they are polled to give each its own time
+        if USE_KEYPAD and not EAGER_DEBOUNCE and not poll and not self.debounce_calibrated:
+            try:
+                from picochord.keypad_scanner import KeypadScanner
+                pins = []
+                bits = []
+                for switch in key_switches:
+                    pins.append(switch.pin)
+                    bits.append(switch.bit)
+                interval = max(self.debounce_intervals) / 1000
+                return KeypadScanner(pins, bits, interval=interval)
+            except ImportError:
+                print("No keypad module, polling the keys")
+        # Make the scanner that reads all the key switches at once
+        pins = []
+        for switch in key_switches:
+            # make a digital io from the pin
+            io = DigitalInOut(switch.pin)
+            # add a pullup
+            io.pull = Pull.UP
+            pins.append((io, switch.bit))
+        bank = PinBank(pins)
+        if poll or EAGER_DEBOUNCE or self.debounce_calibrated:
+            return TunedScanner(bank, self.debounce_intervals, eager=EAGER_DEBOUNCE)
+        if USE_TICKS:
+            # TickRuntime calls scan() for every tick
+            return ChordScanner(bank, interval=DEBOUNCE_TIME, scan_rate=SCAN_RATE_HZ)
+        return ChordScanner(bank, interval=DEBOUNCE_TIME)
+
+    def replace_scanner(self, poll=False):
+        # the scan side mustn't be using the scanner while it is changed
+        if self.split is not None:
+            self.split.pause()
+        self.scanner.deinit()
+        self.scanner = self.make_scanner(self.key_switches, poll)
+        if self.split is not None:
+            self.split.resume()
+
+    def start_calibration(self):
+        # calibration has to see every edge from the switches, so they
+        # are polled while it runs
+        self.replace_scanner(poll=True)
+        self.scanner.start_calibration()
+
+    def finish_calibration(self):
+        intervals = self.scanner.finish_calibration()
+        if nvm is not None:
+            save_intervals(nvm, intervals, NVM_DEBOUNCE)
+        self.debounce_intervals = intervals
+        self.debounce_calibrated = True
+        self.replace_scanner()
+        return intervals
+
+    def key_down(self):
+        self.scanner.update()
+        return self.scanner.any_down()
+        
+    def wait_for_all_keys_up(self):
+        while True:
+            if self.key_down():
+                # nothing to do until a key changes
+                self.scanner.wait(IDLE_WAIT_TIME)
+                continue
+            return
+
+    def idle(self):
+        # True when nothing will happen until a key changes
+        return (self.mode == PicoChord.TEXT_MODE and
+            not self.scanner.any_down() and
+            len(self.events) == 0 and
+            not self.output_waiting() and
+            not self.display_scheduler.busy and
+            not self.display_scheduler.dirty and
+            not self.pixels.dirty)
+
+    def wait_if_idle(self):
+        if self.idle():
+            if not self.heap_clean:
+                # collect now, rather than have a collection hold up
+                # the next chord
+                self.collect_garbage()
+            self.scanner.wait(IDLE_WAIT_TIME)
+        
+    def test(self):
+        self.display_scheduler.show("Test")
+        scanner = self.scanner
+        while True:
+            # scan the keyboard and turn pressed keys red
+            scanner.update()
+            for key in self.keys:
+                # get the key number
+                bit = key.bit
+                if scanner.pressed & bit:
+                    print("Key down:", bit)
+                    self.pixels[key.pixel]=Col.RED
+                    self.display_scheduler.show(f"D{bit}")
+                if scanner.released & bit:
+                    print("Key up:", bit)
+                    self.pixels[key.pixel]=Col.GREY
+                    self.display_scheduler.show(f"U{bit}")
+            self.display_scheduler.update()
+            self.pixels.show()
+    
+    def held_keys(self):
+        # the debounced keys down, which the chord assembler starts again
+        # from if key edges have been lost
+        return self.scanner.state
+
+    @property
+    def character_bits(self):
+        # the keys held down in the chord being assembled
+        return self.chords.bits
+
+    def update_keys(self, profiler=None):
+        # sample the switches and queue any key edges
+        scanner = self.scanner
+        if not scanner.due():
+            return
+        raw = scanner.read()
+        if profiler is not None:
+            profiler.lap(PicoChord.STAGE_SCAN)
+        if scanner.debounce(raw):
+            self.queue_keys()
+
+    def scan_keys(self):
+        # sample the switches now, for a caller that keeps the scan rate
+        if self.scanner.scan():
+            self.queue_keys()
+
+    def queue_keys(self):
+        # queue the key edges from the latest sample
+        scanner = self.scanner
+        pressed = scanner.pressed
+        released = scanner.released
+        ticks = ticks_ms()
+        if pressed:
+            self.events.put(pressed, KEY_DOWN, ticks)
+        if released:
+            self.events.put(released, KEY_UP, ticks)
+        for key in self.keys:
+            if pressed & key.bit:
+                key.key_down()
+            if released & key.bit:
+                key.key_up()
+
+    def update_key_cols(self):
+        for key in self.keys:
+            key.update()
+
+    # Main loop stages timed by the profiler
+    STAGE_SCAN = 0
+    STAGE_DEBOUNCE = 1
+    STAGE_KEYS = 2
+    STAGE_CHORDS = 3
+    STAGE_OUTPUT = 4
+    STAGE_PROCESSOR = 5
+    STAGE_DISPLAY = 6
+    STAGE_PIXELS = 7
+    PROFILE_STAGES = ("scan", "debounce", "key colours", "chords",
+        "hid output", "processor", "display", "pixels")
+
+    def update(self):
+        latency = self.latency
+        if latency is not None:
+            loop_start = ticks_ms()
+        profiler = self.profiler
+        if profiler is None:
+            self.update_keys()
+            self.update_key_cols()
+            # act on any chords that have been completed
+            self.chords.process()
+            self.flush_output()
+            processor = self.mode_processors[self.mode]
+            processor.update()
+            self.display_scheduler.update()
+            self.pixels.show() 
+        else:
+            profiler.start()
+            self.update_keys(profiler)
+            profiler.lap(PicoChord.STAGE_DEBOUNCE)
+            self.update_key_cols()
+            profiler.lap(PicoChord.STAGE_KEYS)
+            self.chords.process()
+            profiler.lap(PicoChord.STAGE_CHORDS)
+            self.flush_output()
+            profiler.lap(PicoChord.STAGE_OUTPUT)
+            processor = self.mode_processors[self.mode]
+            processor.update()
+            profiler.lap(PicoChord.STAGE_PROCESSOR)
+            self.display_scheduler.update()
+            profiler.lap(PicoChord.STAGE_DISPLAY)
+            self.pixels.show() 
+            profiler.lap(PicoChord.STAGE_PIXELS)
+            profiler.end()
+        if latency is not None:
+            latency.loop_time(ticks_ms_diff(ticks_ms(), loop_start))
+        
+    def run(self):
+        if USE_ASYNCIO:
+            from picochord.runtime import AsyncRuntime
+            AsyncRuntime(self).run()
+            return
+        if SPLIT_CORES:
+            from picochord.splitcore import SplitRuntime
+            SplitRuntime(self).run()
+            return
+        if USE_TICKS:
+            from picochord.ticks import TickRuntime
+            TickRuntime(self, scan_rate=SCAN_RATE_HZ,
+                pixel_rate=PIXEL_REFRESH_HZ).run()
+            return
+        while True:
+            self.update()
+            self.wait_if_idle()
+
+# Build the keyboard for the switch wiring. The simulator in the sim
+# folder uses this to make a keyboard without running it.
+def make_keyboard():
+    if RIGHT_HANDED:
+        key_switches=[
+            Switch(pin=board.GP15,pixel=0,bit=1),  # control
+            Switch(pin=board.GP14,pixel=1,bit=2),  # thumb
+            Switch(pin=board.GP13,pixel=2,bit=4),  # index
+            Switch(pin=board.GP12,pixel=3,bit=8),  # middle
+            Switch(pin=board.GP11,pixel=4,bit=16), # ring
+            Switch(pin=board.GP10,pixel=5,bit=32)  # little
+            ]
+    else:
+        key_switches=[
+            Switch(pin=board.GP15,pixel=0,bit=32),  # control
+            Switch(pin=board.GP14,pixel=1,bit=16),  # thumb
+            Switch(pin=board.GP13,pixel=2,bit=8),  # index
+            Switch(pin=board.GP12,pixel=3,bit=4),  # middle
+            Switch(pin=board.GP11,pixel=4,bit=2), # ring
+            Switch(pin=board.GP10,pixel=5,bit=1)  # little
+            ]
+    return PicoChord(i2c_sda=board.GP0, i2c_scl=board.GP1,
+                pixel_pin=board.GP17,
+                key_switches=key_switches)
+
+def main(start_ns=None):
+    # start_ns is the time.monotonic_ns() value when code.py started
+    timer = None
+    if BOOT_TIMING:
+        timer = BootTimer(start_ns)
+        timer.mark("imports")
+    keyboard = make_keyboard()
+    if timer is not None:
+        timer.mark("keyboard built")
+        keyboard.update()
+        timer.mark("first scan")
+        timer.report()
+    keyboard.run()
@@ -0,0 +1,22 @@
+# The built in chord maps
+#
+# Each map takes the bit pattern of a chord to the character it
+# produces. The upper case map is made from the text map.
+
+TEXT_DECODE = {
+    12:'a', 56:'b', 10:'c', 14:'d', 4:'e', 30:'f', 48:'g', 34:'h',
+    6:'i', 50:'j', 18:'k', 38:'l', 60:'m', 24:'n', 8:'o', 62:'p',
+    40:'q', 22:'r', 16:'s', 20:'t', 32:'u', 36:'v', 54:'w', 58:'x',
+    26:'y', 42:'z', 2:' ', 52:',',  28:'.'}
+
+NUM_DECODE = {
+    8:'0', 2:'1', 6:'2', 14:'3', 30:'4', 62:'5', 32:'6', 48:'7',
+    56:'8', 60:'9', 52:',',  28:'.'
+    }
+
+SYM_DECODE = {
+    2:' ', 52:',',  28:'.', 54:':', 50:';', 42:'%', 4:'=', 22:'&',
+    14:'(', 56:')', 16:'$', 12:'@', 62 :'+', 34:'#' ,
+    24:'-', 58 :'!', 26:'?', 18:'/',30:'{',60:'}',
+    10:'[', 40:']',36:'\\',20:'*',6:'<',48:'>'
+    }
@@ -0,0 +1,93 @@
+# Compiled keymap files
+#
+# A keymap file holds the chord table for each keyboard state, so that
+# the layout can be changed by copying a new file onto the CIRCUITPY
+# drive instead of editing the program. tools/keymapc.py compiles one
+# from a readable source file.
+#
+# The file starts with MAGIC, the format version, the number of states,
+# which must be STATE_COUNT, and the number of command names. Each command name follows as a length
+# byte and the ASCII name. Then each state has CHORD_COUNT entries, one
+# for each chord in bit order:
+#
+#   0x00         the chord does nothing
+#   0x01 - 0x7f  that many bytes of ASCII text follow
+#   0x80 - 0xbf  run the command with this number (less 0x80)
+#   0xc0         send the keycode in the next byte
+
+from picochord.dispatch import CHORD_COUNT
+
+MAGIC = b"PCKM"
+VERSION = 1
+# upper case, lower case, numbers and symbols
+STATE_COUNT = 4
+ENTRY_COMMAND = 0x80
+ENTRY_KEYCODE = 0xC0
+MAX_TEXT = ENTRY_COMMAND - 1
+MAX_COMMANDS = ENTRY_KEYCODE - ENTRY_COMMAND
+
+
+def load_keymap(path, commands, key_command):
+    # Returns a tuple of chord tables, as made by compile_state_tables.
+    # commands maps command names to command tuples and key_command makes
+    # the command tuple for a keycode. Raises OSError if the file can't be
+    # read and ValueError if it isn't a keymap this code understands.
+    with open(path, "rb") as file:
+        data = file.read()
+    try:
+        return parse_keymap(data, commands, key_command)
+    except IndexError:
+        raise ValueError("Keymap file is truncated")
+
+
+def parse_keymap(data, commands, key_command):
+    if data[0:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a keymap file")
+    pos = len(MAGIC)
+    if data[pos] != VERSION:
+        raise ValueError("Keymap file version " + str(data[pos]))
+    state_count = data[pos + 1]
+    if state_count != STATE_COUNT:
+        raise ValueError("Keymap file has " + str(state_count) + " states")
+    name_count = data[pos + 2]
+    pos = pos + 3
+    named = []
+    for _ in range(name_count):
+        length = data[pos]
+        name = str(data[pos + 1:pos + 1 + length], "ascii")
+        if name not in commands:
+            raise ValueError("Unknown command " + name)
+        named.append(commands[name])
+        pos = pos + 1 + length
+    # chords that send the same keycode share a command tuple
+    keycodes = {}
+    tables = []
+    for _ in range(state_count):
+        table = [None] * CHORD_COUNT
+        for bits in range(CHORD_COUNT):
+            entry = data[pos]
+            pos = pos + 1
+            if entry == 0:
+                continue
+            if entry < ENTRY_COMMAND:
+                text = data[pos:pos + entry]
+                # the keyboard layout only has keys for ASCII characters
+                for code in text:
+                    if code >= 0x80:
+                        raise ValueError("Keymap text is not ASCII")
+                table[bits] = str(text, "ascii")
+                pos = pos + entry
+            elif entry < ENTRY_KEYCODE:
+                table[bits] = named[entry - ENTRY_COMMAND]
+            elif entry == ENTRY_KEYCODE:
+                code = data[pos]
+                pos = pos + 1
+                if code not in keycodes:
+                    keycodes[code] = key_command(code)
+                table[bits] = keycodes[code]
+            else:
+                raise ValueError("Bad keymap entry " + str(entry))
+        tables.append(tuple(table))
+    if pos != len(data):
+        raise ValueError("Keymap file has extra data")
+    return tuple(tables)
@@ -0,0 +1,82 @@
+# Key scanner using the CircuitPython keypad module
+#
+# keypad scans and debounces the switches in the background and queues
+# the key events, so the main loop only has work to do when a switch
+# has changed. This has the same interface as ChordScanner.
+
+import time
+
+import keypad
+
+
+class KeypadScanner:
+
+    def __init__(self, pins, bits, interval=0.01, idle_sleep=0.001):
+        self.keys = keypad.Keys(pins, value_when_pressed=False, pull=True,
+            interval=interval)
+        # the chord bit for each keypad key number
+        self.bits = tuple(bits)
+        self.mask = 0
+        for bit in self.bits:
+            self.mask = self.mask | bit
+        # event object reused for every read
+        self.event = keypad.Event()
+        self.idle_sleep = idle_sleep
+        self.state = 0
+        self.pressed = 0
+        self.released = 0
+
+    def due(self):
+        # Returns True if keypad has queued an event
+        if len(self.keys.events) == 0:
+            self.pressed = 0
+            self.released = 0
+            return False
+        return True
+
+    def read(self):
+        # Apply the next queued event to the key state. Events are taken one
+        # at a time so that a press and release are never merged.
+        raw = self.state
+        event = self.event
+        if self.keys.events.get_into(event):
+            bit = self.bits[event.key_number]
+            if event.pressed:
+                raw = raw | bit
+            else:
+                raw = raw & ~bit
+        return raw
+
+    def debounce(self, raw):
+        # keypad has already debounced the keys
+        toggle = (raw ^ self.state) & self.mask
+        self.state = raw
+        self.pressed = toggle & raw
+        self.released = toggle & ~raw
+        return toggle
+
+    def scan(self):
+        # Apply the next queued event, if there is one
+        return self.debounce(self.read())
+
+    def update(self):
+        if not self.due():
+            return False
+        return self.debounce(self.read()) != 0
+
+    def any_down(self):
+        return self.state != 0
+
+    def wait(self, timeout):
+        # Sleep until a key event arrives or timeout seconds pass. Returns
+        # True if there is an event waiting.
+        events = self.keys.events
+        end = time.monotonic() + timeout
+        while len(events) == 0:
+            if time.monotonic() >= end:
+                return False
+            time.sleep(self.idle_sleep)
+        return True
+
+    def deinit(self):
+        self.keys.deinit()
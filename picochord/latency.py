@@ -0,0 +1,105 @@
+# Chord latency measurement
+#
+# Times are millisecond ticks from picochord.events, the same as the key
+# events, as reading them never allocates. Each chord is timed from the
+# first key press and from the key release that completed it to the
+# moment its output has been sent. The times are kept in microseconds,
+# in whole milliseconds, in fixed size histograms so that recording
+# never allocates.
+
+from array import array
+
+from picochord.events import ticks_ms, ticks_ms_diff
+
+
+class LatencyHistogram:
+
+    def __init__(self, bucket_us=250, buckets=160):
+        self.bucket_us = bucket_us
+        self.buckets = buckets
+        # the last bucket counts everything too slow for the others
+        self.counts = array("L", [0] * buckets)
+        self.count = 0
+        self.max_us = 0
+
+    def record(self, us):
+        index = us // self.bucket_us
+        if index >= self.buckets:
+            index = self.buckets - 1
+        self.counts[index] = self.counts[index] + 1
+        self.count = self.count + 1
+        if us > self.max_us:
+            self.max_us = us
+
+    def percentile(self, percent):
+        # Upper bound in microseconds of the bucket holding the percentile
+        if self.count == 0:
+            return 0
+        target = (self.count * percent + 99) // 100
+        total = 0
+        for index in range(self.buckets):
+            total = total + self.counts[index]
+            if total >= target:
+                if index == self.buckets - 1:
+                    # the last bucket has no upper bound of its own
+                    return self.max_us
+                return min((index + 1) * self.bucket_us, self.max_us)
+        return self.max_us
+
+    def reset(self):
+        for index in range(self.buckets):
+            self.counts[index] = 0
+        self.count = 0
+        self.max_us = 0
+
+
+class LatencyMonitor:
+
+    def __init__(self):
+        # first key down to output sent
+        self.chord = LatencyHistogram()
+        # completing key release to output sent
+        self.release = LatencyHistogram()
+        # completing key release to the chord being decoded
+        self.decode = LatencyHistogram()
+        self.max_loop_us = 0
+        self.down_ticks = 0
+        self.up_ticks = 0
+        # True while a decoded chord is waiting for its output
+        self.pending = False
+
+    def chord_decoded(self, down_ticks, up_ticks):
+        self.down_ticks = down_ticks
+        self.up_ticks = up_ticks
+        self.decode.record(ticks_ms_diff(ticks_ms(), up_ticks) * 1000)
+        self.pending = True
+
+    def chord_sent(self):
+        if not self.pending:
+            return
+        now = ticks_ms()
+        self.chord.record(ticks_ms_diff(now, self.down_ticks) * 1000)
+        self.release.record(ticks_ms_diff(now, self.up_ticks) * 1000)
+        self.pending = False
+
+    def loop_time(self, ms):
+        us = ms * 1000
+        if us > self.max_loop_us:
+            self.max_loop_us = us
+
+    def reset(self):
+        self.chord.reset()
+        self.release.reset()
+        self.decode.reset()
+        self.max_loop_us = 0
+        self.pending = False
+
+    def report(self):
+        print("Latency (us)     count     p50     p95     p99     max")
+        for name, histogram in (("press to send", self.chord),
+                ("release to send", self.release),
+                ("release to decode", self.decode)):
+            print("{0:17}{1:6}{2:8}{3:8}{4:8}{5:8}".format(name, histogram.count,
+                histogram.percentile(50), histogram.percentile(95),
+                histogram.percentile(99), histogram.max_us))
+        print("Max loop time (us):", self.max_loop_us)
@@ -0,0 +1,146 @@
+# Abbreviation expansion
+#
+# Typing a trigger word followed by a space or punctuation replaces the
+# word with its expansion, so "btw " becomes "by the way ". The triggers
+# are held in a trie in a compiled macro file made by tools/macroc.py.
+# The file is kept as one bytes object and searched where it lies, so a
+# large set of macros doesn't make lots of small objects on the heap.
+#
+# The file starts with MAGIC, the format version, the length of the
+# longest trigger, the size of the node area and the number of
+# expansions, the sizes as 16 bit little endian values. Then come the
+# nodes, an index of (offset, length) for each expansion, and the ASCII
+# text of the expansions.
+#
+# A node is a child count, the expansion number plus one (0 if no
+# trigger ends at the node) and then a (character, node offset) entry
+# for each child, sorted by character.
+
+from array import array
+
+MAGIC = b"PCMX"
+VERSION = 1
+HEADER_SIZE = 10
+NODE_HEADER = 3
+CHILD_SIZE = 3
+INDEX_SIZE = 3
+# the typing position isn't in a word any trigger starts with
+NO_NODE = 0xFFFF
+
+
+def read_u16(data, pos):
+    return data[pos] | (data[pos + 1] << 8)
+
+
+def is_word_char(ch):
+    return ch.isalpha() or ch.isdigit() or ch == "'"
+
+
+class MacroExpander:
+
+    def __init__(self, data):
+        if len(data) < HEADER_SIZE:
+            raise ValueError("Macro file is truncated")
+        if data[0:len(MAGIC)] != MAGIC:
+            raise ValueError("Not a macro file")
+        if data[4] != VERSION:
+            raise ValueError("Macro file version " + str(data[4]))
+        self.data = data
+        self.max_trigger = data[5]
+        node_bytes = read_u16(data, 6)
+        self.count = read_u16(data, 8)
+        self.nodes = HEADER_SIZE
+        self.index = self.nodes + node_bytes
+        self.text = self.index + self.count * INDEX_SIZE
+        if self.text > len(data):
+            raise ValueError("Macro file is truncated")
+        # the node reached by each character of the current word, so that
+        # a backspace can step back one
+        self.path = array("H", [0] * (self.max_trigger + 2))
+        self.trigger_length = 0
+        self.reset(self.nodes)
+
+    def reset(self, node=NO_NODE):
+        # Start again at node. The default is for when the cursor has moved
+        # and the word being typed isn't known, so nothing can match until
+        # the next word starts.
+        self.depth = 0
+        self.node = node
+        self.path[0] = node
+
+    def child(self, node, code):
+        # binary search of the children of node for the character code
+        data = self.data
+        low = 0
+        high = data[node] - 1
+        base = node + NODE_HEADER
+        while low <= high:
+            middle = (low + high) // 2
+            pos = base + middle * CHILD_SIZE
+            child_code = data[pos]
+            if child_code == code:
+                return self.nodes + read_u16(data, pos + 1)
+            if child_code < code:
+                low = middle + 1
+            else:
+                high = middle - 1
+        return NO_NODE
+
+    def typed(self, ch):
+        # Follow a typed character. Returns the expansion number if ch ends
+        # a trigger word, otherwise -1.
+        if is_word_char(ch):
+            node = self.node
+            if node != NO_NODE:
+                code = ord(ch)
+                if code < 128:
+                    node = self.child(node, code)
+                else:
+                    node = NO_NODE
+            self.depth = self.depth + 1
+            if self.depth > self.max_trigger:
+                node = NO_NODE
+            else:
+                self.path[self.depth] = node
+            self.node = node
+            return -1
+        expansion = -1
+        node = self.node
+        if node != NO_NODE and self.depth > 0:
+            expansion = read_u16(self.data, node + 1) - 1
+            # the number of characters to rub out
+            self.trigger_length = self.depth
+        # the next word starts after this character
+        self.reset(self.nodes)
+        return expansion
+
+    def backspace(self):
+        if self.depth == 0:
+            # deleting into the word before, which we don't have
+            self.reset()
+            return
+        self.depth = self.depth - 1
+        if self.depth > self.max_trigger:
+            self.node = NO_NODE
+        else:
+            self.node = self.path[self.depth]
+
+    def expansion(self, number):
+        # Returns the start and end of the expansion text in data
+        pos = self.index + number * INDEX_SIZE
+        start = self.text + read_u16(self.data, pos)
+        return start, start + self.data[pos + 2]
+
+
+def load_macros(path):
+    # Returns a MacroExpander for the macro file, or None if there isn't
+    # one. Raises ValueError if the file isn't a macro file.
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+    except OSError:
+        return None
+    try:
+        return MacroExpander(data)
+    except IndexError:
+        raise ValueError("Macro file is truncated")
@@ -0,0 +1,85 @@
+# Change tracking frame buffer in front of the NeoPixels
+#
+# Sending data to the pixels is slow, so colours are written into a
+# compact buffer and only sent on to the pixels when something has
+# changed, no more often than the maximum refresh rate.
+
+from picochord.events import ticks_ms, ticks_ms_diff
+
+
+class PixelFrame:
+
+    def __init__(self, pixels, count, max_rate=100):
+        self.pixels = pixels
+        self.count = count
+        self.buffer = bytearray(3 * count)
+        # the pixels are in an unknown state until the first show
+        self.dirty = True
+        if max_rate:
+            self.min_interval_ms = 1000 // max_rate
+        else:
+            self.min_interval_ms = 0
+        self.last_show = ticks_ms()
+        # the first frame goes out straight away
+        self.first_frame = True
+        # frames sent to the pixels and show requests that were skipped
+        self.transmitted = 0
+        self.suppressed = 0
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        pos = index * 3
+        buffer = self.buffer
+        return (buffer[pos], buffer[pos + 1], buffer[pos + 2])
+
+    def __setitem__(self, index, col):
+        pos = index * 3
+        buffer = self.buffer
+        r, g, b = col
+        if buffer[pos] != r or buffer[pos + 1] != g or buffer[pos + 2] != b:
+            buffer[pos] = r
+            buffer[pos + 1] = g
+            buffer[pos + 2] = b
+            self.dirty = True
+
+    def fill(self, col):
+        for index in range(self.count):
+            self[index] = col
+
+    def show(self, force=False):
+        # Send the frame to the pixels if it has changed and the refresh
+        # interval has passed. Returns True if the pixels were written.
+        if not self.dirty:
+            self.suppressed = self.suppressed + 1
+            return False
+        now = ticks_ms()
+        if not force and not self.first_frame and ticks_ms_diff(now, self.last_show) < self.min_interval_ms:
+            # leave the frame dirty so it goes out on a later show
+            self.suppressed = self.suppressed + 1
+            return False
+        buffer = self.buffer
+        pixels = self.pixels
+        pos = 0
+        for index in range(self.count):
+            pixels[index] = (buffer[pos] << 16) | (buffer[pos + 1] << 8) | buffer[pos + 2]
+            pos = pos + 3
+        pixels.show()
+        self.dirty = False
+        self.first_frame = False
+        self.last_show = now
+        self.transmitted = self.transmitted + 1
+        return True
+
+    def reset_counters(self):
+        self.transmitted = 0
+        self.suppressed = 0
+
+    def write_pattern(self, pattern, on_col, off_col):
+        # Set every pixel to on_col or off_col from a sequence of flags
+        for index in range(self.count):
+            if pattern[index]:
+                self[index] = on_col
+            else:
+                self[index] = off_col
@@ -0,0 +1,140 @@
+# Next character prediction
+#
+# Counts how often each character follows the one or two characters
+# before it, and predicts the most likely next one so that its chord
+# can be lit as a guide. The counts are kept in fixed size byte arrays
+# along with the best next character for each context, so following a
+# typed character and making a prediction both take the same short time
+# however much has been typed.
+#
+# Only letters and space are counted. Anything else counts as a space,
+# and a run of spaces counts as one.
+# A count that reaches 255 halves the counts for its context, which
+# keeps them in a byte and lets the table follow changes in the text.
+#
+# A model file is MAGIC, the format version, the alphabet size and then
+# the pair counts and the triple counts.
+
+ALPHABET = " abcdefghijklmnopqrstuvwxyz"
+SIZE = len(ALPHABET)
+MAGIC = b"PCNG"
+VERSION = 1
+# a context must have been seen this often before its triples are used
+MIN_TRIPLES = 3
+
+
+class NgramPredictor:
+
+    def __init__(self):
+        # the symbol number of each ASCII character
+        self.symbols = bytearray(128)
+        # and the character code of each symbol
+        self.codes = ALPHABET.encode()
+        for symbol in range(SIZE):
+            ch = ALPHABET[symbol]
+            self.symbols[ord(ch)] = symbol
+            self.symbols[ord(ch.upper())] = symbol
+        # counts of next symbol after one symbol and after two
+        self.pairs = bytearray(SIZE * SIZE)
+        self.triples = bytearray(SIZE * SIZE * SIZE)
+        # most likely next symbol, and the total seen, for each context
+        self.best_pair = bytearray(SIZE)
+        self.best_triple = bytearray(SIZE * SIZE)
+        self.triple_seen = bytearray(SIZE * SIZE)
+        self.reset()
+
+    def reset(self):
+        # nothing is known about what was typed before
+        self.last = 0
+        self.context = 0
+
+    def symbol(self, ch):
+        code = ord(ch)
+        if code < 128:
+            return self.symbols[code]
+        return 0
+
+    def count(self, counts, best, row, symbol):
+        # Add one to the count of symbol in row and keep best up to date
+        base = row * SIZE
+        pos = base + symbol
+        if counts[pos] == 255:
+            for i in range(base, base + SIZE):
+                counts[i] = counts[i] >> 1
+        counts[pos] = counts[pos] + 1
+        if counts[pos] > counts[base + best[row]]:
+            best[row] = symbol
+
+    def typed(self, ch):
+        # Learn from a typed character and make it the latest context
+        symbol = self.symbol(ch)
+        if symbol == 0 and self.last == 0:
+            # runs of spaces and punctuation count as one space
+            return
+        self.count(self.pairs, self.best_pair, self.last, symbol)
+        context = self.context
+        self.count(self.triples, self.best_triple, context, symbol)
+        if self.triple_seen[context] < 255:
+            self.triple_seen[context] = self.triple_seen[context] + 1
+        self.last = symbol
+        self.context = (context % SIZE) * SIZE + symbol
+
+    def train(self, text):
+        for ch in text:
+            self.typed(ch)
+        self.reset()
+
+    def predict(self):
+        # Returns the character code of the most likely next character, or
+        # -1 if nothing has been learned about the current context
+        context = self.context
+        if self.triple_seen[context] >= MIN_TRIPLES:
+            symbol = self.best_triple[context]
+            if self.triples[context * SIZE + symbol]:
+                return self.codes[symbol]
+        symbol = self.best_pair[self.last]
+        if self.pairs[self.last * SIZE + symbol]:
+            return self.codes[symbol]
+        return -1
+
+    def rebuild(self):
+        # Work out the best next symbols after loading new counts
+        for row in range(SIZE):
+            self.best_pair[row] = self.best_in(self.pairs, row)
+        for row in range(SIZE * SIZE):
+            self.best_triple[row] = self.best_in(self.triples, row)
+            total = 0
+            for i in range(row * SIZE, row * SIZE + SIZE):
+                total = total + self.triples[i]
+            self.triple_seen[row] = min(total, 255)
+
+    def best_in(self, counts, row):
+        best = 0
+        base = row * SIZE
+        for symbol in range(SIZE):
+            if counts[base + symbol] > counts[base + best]:
+                best = symbol
+        return best
+
+    def load(self, path):
+        # Read the counts from a model file. Raises OSError if the file
+        # can't be read and ValueError if it isn't a model file.
+        with open(path, "rb") as file:
+            header = file.read(len(MAGIC) + 2)
+            if (len(header) < len(MAGIC) + 2 or header[0:len(MAGIC)] != MAGIC or
+                    header[len(MAGIC)] != VERSION):
+                raise ValueError("Not a prediction model file")
+            if header[len(MAGIC) + 1] != SIZE:
+                raise ValueError("Prediction model has the wrong alphabet")
+            if (file.readinto(self.pairs) != len(self.pairs) or
+                    file.readinto(self.triples) != len(self.triples)):
+                raise ValueError("Prediction model is truncated")
+        self.rebuild()
+        self.reset()
+
+    def save(self, path):
+        with open(path, "wb") as file:
+            file.write(MAGIC)
+            file.write(bytes((VERSION, SIZE)))
+            file.write(self.pairs)
+            file.write(self.triples)
@@ -0,0 +1,65 @@
+# Main loop profiler
+#
+# Accumulates the time spent in each stage of the main loop into
+# preallocated counters. Each loop calls start(), then lap() at the end
+# of every stage and end() when the loop is complete.
+
+from array import array
+
+from picochord.events import ticks_diff, ticks_us
+
+
+class LoopProfiler:
+
+    def __init__(self, names, report_interval=0):
+        self.names = names
+        self.totals = array("L", [0] * len(names))
+        self.loops = 0
+        self.chords = 0
+        self.mark = 0
+        self.elapsed_us = 0
+        # seconds between automatic reports, 0 for none
+        self.report_interval_us = int(report_interval * 1_000_000)
+
+    def start(self):
+        self.mark = ticks_us()
+
+    def lap(self, stage):
+        now = ticks_us()
+        self.totals[stage] = self.totals[stage] + ticks_diff(now, self.mark)
+        self.mark = now
+
+    def end(self):
+        self.loops = self.loops + 1
+        if self.report_interval_us:
+            # the stage totals are the time actually measured
+            elapsed = 0
+            for total in self.totals:
+                elapsed = elapsed + total
+            if elapsed >= self.report_interval_us:
+                self.report()
+                self.reset()
+
+    def chord(self):
+        self.chords = self.chords + 1
+
+    def reset(self):
+        for stage in range(len(self.totals)):
+            self.totals[stage] = 0
+        self.loops = 0
+        self.chords = 0
+
+    def report(self):
+        total = 0
+        for stage_total in self.totals:
+            total = total + stage_total
+        if self.loops == 0 or total == 0:
+            print("No loops profiled")
+            return
+        print("Loops:", self.loops, "chords:", self.chords,
+            "rate: {0:.1f} Hz".format(self.loops * 1_000_000 / total))
+        print("Stage             us/loop       %")
+        for stage in range(len(self.names)):
+            stage_total = self.totals[stage]
+            print("{0:14}{1:12.1f}{2:8.1f}".format(self.names[stage],
+                stage_total / self.loops, stage_total * 100 / total))
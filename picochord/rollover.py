@@ -0,0 +1,125 @@
+# Chord assembly with rollover
+#
+# Fast typists often press the first keys of the next chord before
+# they have let go of the last one. The plain ChordAssembler only starts
+# a new chord once every key is up, so those characters are lost. The
+# RolloverAssembler remembers when each key went down. When a chord is
+# released, any of its keys that went down well after the chord started
+# and only just before the release may be the start of the next chord.
+#
+# A chord whose keys land unevenly looks the same at that point, so the
+# late keys are watched until it is clear. They start the next chord if
+# another key goes down, or if they are held on for the window after the
+# rest of the chord is released. If one is let go before that, it was
+# part of the chord after all. Either way the chord is sent then, so it
+# can be held up until the late keys are settled.
+#
+# Keys from a completed chord that are still held are ignored until they
+# are released.
+
+from array import array
+
+from picochord.events import ChordAssembler, ticks_ms_add, ticks_ms_diff
+
+
+class RolloverAssembler(ChordAssembler):
+
+    def __init__(self, queue, got_bits, window=0.03, key_count=6, held_keys=None):
+        super().__init__(queue, got_bits, held_keys)
+        self.window_ms = int(window * 1000)
+        self.key_count = key_count
+        # press time of each key, indexed by bit number
+        self.press_ticks = array("L", [0] * key_count)
+        # keys in the chord being assembled
+        self.chord_bits = 0
+        # late keys of a released chord that may start the next one
+        self.late_bits = 0
+        # whether the rest of that chord is up, and when it went up
+        self.rest_up = False
+        self.rest_up_ticks = 0
+        self.rollovers = 0
+
+    def key_down(self, mask, ticks):
+        for bit_number in range(self.key_count):
+            if mask & (1 << bit_number):
+                self.press_ticks[bit_number] = ticks
+        if self.late_bits:
+            # a new key while late keys are held means they are the start
+            # of the next chord
+            self.roll_over(ticks)
+        if self.chord_bits == 0:
+            # this is the first press of a new character, even if keys
+            # from the last one are still held
+            self.assembling = True
+            self.chord_ticks = ticks
+        self.chord_bits = self.chord_bits | mask
+        self.bits = self.bits | mask
+
+    def late_keys(self, ticks):
+        # Keys in the chord that went down more than the window after it
+        # started and less than the window before ticks
+        late = 0
+        window = self.window_ms
+        for bit_number in range(self.key_count):
+            bit = 1 << bit_number
+            if self.chord_bits & bit:
+                pressed = self.press_ticks[bit_number]
+                if (ticks_ms_diff(pressed, self.chord_ticks) > window and
+                        ticks_ms_diff(ticks, pressed) < window):
+                    late = late | bit
+        return late
+
+    def send_chord(self):
+        self.got_bits(self.chord_bits)
+        self.chord_bits = 0
+        self.late_bits = 0
+        self.assembling = False
+
+    def roll_over(self, ticks):
+        # Send the chord without its late keys, which start the next chord
+        late = self.late_bits
+        self.got_bits(self.chord_bits & ~late)
+        self.rollovers = self.rollovers + 1
+        self.chord_bits = late
+        self.late_bits = 0
+        # the next chord started when the first of them went down
+        earliest = 0
+        for bit_number in range(self.key_count):
+            if late & (1 << bit_number):
+                back = ticks_ms_diff(ticks, self.press_ticks[bit_number])
+                if back > earliest:
+                    earliest = back
+        self.chord_ticks = ticks_ms_add(ticks, -earliest)
+
+    def key_up(self, mask, ticks):
+        self.bits = self.bits & ~mask
+        late = self.late_bits
+        if late:
+            if mask & late:
+                # a late key let go. If it was held on for the window after
+                # the rest of the chord it was the next chord, and this
+                # release completes that one.
+                if (self.rest_up and
+                        ticks_ms_diff(ticks, self.rest_up_ticks) >= self.window_ms):
+                    self.roll_over(ticks)
+                self.send_chord()
+            elif not self.rest_up and self.chord_bits & ~late & self.bits == 0:
+                self.rest_up = True
+                self.rest_up_ticks = ticks
+            return
+        if mask & self.chord_bits:
+            # a key in the chord has been released - we have a char, unless
+            # keys still held went down late
+            late = self.late_keys(ticks) & self.bits
+            if late:
+                self.late_bits = late
+                self.rest_up = self.chord_bits & ~late & self.bits == 0
+                self.rest_up_ticks = ticks
+            else:
+                self.send_chord()
+
+    def reset(self):
+        super().reset()
+        self.chord_bits = 0
+        self.late_bits = 0
+        self.rest_up = False
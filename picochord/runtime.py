@@ -0,0 +1,81 @@
+# asyncio runtime for the keyboard
+#
+# Runs each part of the main loop as a separate task: key scanning,
+# chord dispatch, keyboard output, pixel refresh and the display. Every
+# task yields to the others after each step, so a long piece of output
+# never holds up the scanning.
+
+import asyncio
+
+
+class AsyncRuntime:
+
+    def __init__(self, keyboard, scan_interval=0.001, pixel_interval=1 / 60,
+            display_interval=0.01):
+        self.keyboard = keyboard
+        self.scan_interval = scan_interval
+        self.pixel_interval = pixel_interval
+        self.display_interval = display_interval
+        self.running = False
+
+    async def scan_task(self):
+        keyboard = self.keyboard
+        while self.running:
+            keyboard.update_keys()
+            await asyncio.sleep(self.scan_interval)
+
+    async def chord_task(self):
+        keyboard = self.keyboard
+        events = keyboard.events
+        while self.running:
+            keyboard.chords.process()
+            keyboard.mode_processors[keyboard.mode].update()
+            if len(events) == 0:
+                # nothing to do until the scanner has had another look
+                await asyncio.sleep(self.scan_interval)
+            else:
+                await asyncio.sleep(0)
+
+    async def output_task(self):
+        keyboard = self.keyboard
+        while self.running:
+            if keyboard.output_waiting():
+                keyboard.flush_output()
+                await asyncio.sleep(0)
+            else:
+                await asyncio.sleep(self.scan_interval)
+
+    async def pixel_task(self):
+        keyboard = self.keyboard
+        while self.running:
+            keyboard.update_key_cols()
+            keyboard.pixels.show()
+            await asyncio.sleep(self.pixel_interval)
+
+    async def display_task(self):
+        scheduler = self.keyboard.display_scheduler
+        while self.running:
+            scheduler.update()
+            await asyncio.sleep(self.display_interval)
+
+    async def main(self, script=None):
+        # Run the tasks until stop() is called or, if a script coroutine
+        # is given, until the script finishes
+        self.running = True
+        tasks = [
+            asyncio.create_task(self.scan_task()),
+            asyncio.create_task(self.chord_task()),
+            asyncio.create_task(self.output_task()),
+            asyncio.create_task(self.pixel_task()),
+            asyncio.create_task(self.display_task()),
+        ]
+        if script is not None:
+            await script
+            self.running = False
+        await asyncio.gather(*tasks)
+
+    def run(self, script=None):
+        asyncio.run(self.main(script))
+
+    def stop(self):
+        self.running = False
@@ -0,0 +1,163 @@
+# Parallel key scanner for the chord keyboard
+#
+# All the switches are sampled into a single integer mask on each tick
+# and the whole bank is debounced at once using a two bit vertical
+# counter. A key has to read the same new level for four consecutive
+# samples before the debounced state changes, so the debounce interval
+# is four sample periods.
+#
+# A scanner made with a scan_rate is sampled by scan() that many times a
+# second instead, and counts the whole debounce interval in samples with
+# a vertical counter as wide as that count needs.
+
+import time
+
+from picochord.events import ticks_ms, ticks_ms_add, ticks_ms_diff
+
+# number of identical samples the vertical counter needs to flip a key
+DEBOUNCE_SAMPLES = 4
+
+
+class PinBank:
+    # Reads a set of pull-up switch inputs into one active high mask.
+    # pins is a sequence of (DigitalInOut, bit) pairs.
+    def __init__(self, pins):
+        self.pins = tuple(pins)
+        self.mask = 0
+        for io, bit in self.pins:
+            self.mask = self.mask | bit
+
+    def read(self):
+        raw = 0
+        for io, bit in self.pins:
+            if not io.value:
+                # switches pull the pin low when pressed
+                raw = raw | bit
+        return raw
+
+    def deinit(self):
+        # free the pins for another scanner
+        for io, bit in self.pins:
+            io.deinit()
+
+
+class ChordScanner:
+
+    def __init__(self, bank, interval=0.01, scan_rate=None):
+        self.bank = bank
+        self.mask = bank.mask
+        interval_ms = int(interval * 1000)
+        if scan_rate is None:
+            # sample period in whole milliseconds, rounded up so that the
+            # debounce time is never less than the interval
+            self.sample_ms = -(-interval_ms // DEBOUNCE_SAMPLES)
+            self.samples = DEBOUNCE_SAMPLES
+        else:
+            # the new level has to be read from one end of the interval
+            # to the other, so one more sample than the ticks in it
+            self.sample_ms = 1000 // scan_rate
+            self.samples = -(-interval_ms * scan_rate // 1000) + 1
+        if self.sample_ms < 1:
+            self.sample_ms = 1
+        if self.samples < 1:
+            self.samples = 1
+        # keys held down at start up are taken as already pressed
+        self.state = bank.read()
+        # vertical counter bits, all ones means "no change pending"
+        self.count0 = self.mask
+        self.count1 = self.mask
+        if self.samples != DEBOUNCE_SAMPLES:
+            # the bits of a counter of samples, lowest first, counting up
+            # from nothing pending
+            width = 0
+            while (1 << width) <= self.samples:
+                width = width + 1
+            self.counts = [0] * width
+            self.debounce = self.debounce_count
+        # masks of keys that changed on the most recent sample
+        self.pressed = 0
+        self.released = 0
+        self.next_sample = ticks_ms()
+
+    def debounce(self, raw):
+        # Feed one raw sample through the vertical counters. Returns the mask
+        # of keys whose debounced state changed on this sample.
+        mask = self.mask
+        delta = (self.state ^ raw) & mask
+        self.count0 = ~(self.count0 & delta) & mask
+        self.count1 = (self.count0 ^ (self.count1 & delta)) & mask
+        toggle = delta & self.count0 & self.count1
+        self.state = self.state ^ toggle
+        self.pressed = toggle & self.state
+        self.released = toggle & ~self.state
+        return toggle
+
+    def debounce_count(self, raw):
+        # debounce() for a count other than DEBOUNCE_SAMPLES
+        mask = self.mask
+        delta = (self.state ^ raw) & mask
+        counts = self.counts
+        samples = self.samples
+        # count up the keys that differ, the others start again at zero,
+        # and find the keys that have reached the count
+        carry = delta
+        done = delta
+        for index in range(len(counts)):
+            count = counts[index] & delta
+            counts[index] = count ^ carry
+            carry = count & carry
+            if samples & (1 << index):
+                done = done & counts[index]
+            else:
+                done = done & ~counts[index]
+        toggle = done & mask
+        if toggle:
+            for index in range(len(counts)):
+                counts[index] = counts[index] & ~toggle
+        self.state = self.state ^ toggle
+        self.pressed = toggle & self.state
+        self.released = toggle & ~self.state
+        return toggle
+
+    def read(self):
+        return self.bank.read()
+
+    def scan(self):
+        # Sample and debounce now, for a caller that keeps the sample
+        # rate, and start the next sample period so wait() sleeps
+        self.next_sample = ticks_ms_add(ticks_ms(), self.sample_ms)
+        return self.debounce(self.bank.read())
+
+    def due(self):
+        # Returns True if a sample period has passed, and starts the next
+        # one. If not, the pressed and released masks are cleared.
+        now = ticks_ms()
+        if ticks_ms_diff(now, self.next_sample) < 0:
+            self.pressed = 0
+            self.released = 0
+            return False
+        self.next_sample = ticks_ms_add(now, self.sample_ms)
+        return True
+
+    def update(self):
+        # Sample the bank if a sample period has passed. Returns True if
+        # any key changed state, with pressed and released set.
+        if not self.due():
+            return False
+        return self.debounce(self.bank.read()) != 0
+
+    def any_down(self):
+        return self.state != 0
+
+    def wait(self, timeout):
+        # Polling can't sleep until a key changes, so sleep until the next
+        # sample is due, but no longer than timeout seconds
+        delay = ticks_ms_diff(self.next_sample, ticks_ms()) / 1000
+        if delay > timeout:
+            delay = timeout
+        if delay > 0:
+            time.sleep(delay)
+        return False
+
+    def deinit(self):
+        self.bank.deinit()
@@ -0,0 +1,80 @@
+# PICO Chord keyboard settings
+#
+# Change these to suit your keyboard. This file is left as Python
+# source when the rest of the program is compiled by tools/build.py.
+
+# Make this false for a left-handed keyboard
+RIGHT_HANDED = True
+# Fastest rate at which the key lights are refreshed
+PIXEL_REFRESH_HZ = 100
+# Time each character is shown for when text is typed out. The keyboard
+# reports are sent as fast as the host will take them.
+ANIMATION_FRAME_TIME = 0.1
+# Number of characters of help typed between checks for the stop chord
+HELP_CHUNK_SIZE = 32
+# Make this true to record chord latency from power up. The lat command
+# chord also turns recording on and prints the figures.
+LATENCY_STATS = False
+# Make this true to profile the main loop from power up, with a report
+# every PROFILE_REPORT_TIME seconds. The prof command chord turns
+# profiling on and off.
+PROFILE_LOOP = False
+PROFILE_REPORT_TIME = 10
+# Make this true to report heap use by each stage of the main loop and
+# the garbage collection pauses, every PROFILE_REPORT_TIME seconds. The
+# mem command chord turns this on and off.
+GC_STATS = False
+# Make this true to print each chord and key on the serial console.
+# Printing allocates memory, so this is off for normal use.
+DEBUG = False
+# Make this true to run the keyboard as a set of asyncio tasks. This
+# needs the asyncio and adafruit_ticks libraries in the lib folder.
+USE_ASYNCIO = False
+# Make this true to scan the keys and assemble the chords on the second
+# core, so that output never delays a scan. This needs the _thread
+# module. Without it the scanning is done in the main loop as usual.
+SPLIT_CORES = False
+# Make this true to scan the keys at a fixed rate of SCAN_RATE_HZ times a
+# second, doing the rest of the work in the time left between scans. The
+# ticks are whole milliseconds, so use a rate that divides 1000. A polled
+# scanner samples the keys on every tick and counts DEBOUNCE_TIME in ticks.
+USE_TICKS = False
+SCAN_RATE_HZ = 1000
+# Make this false to poll the key switches instead of using the keypad
+# module, which scans them in the background. Once the cal command has
+# timed the switches they are polled anyway, as keypad can only debounce
+# every key for the same time.
+USE_KEYPAD = True
+# Longest time the keyboard sleeps waiting for a key when it is idle
+IDLE_WAIT_TIME = 0.05
+# Keys pressed less than this many seconds before a chord is released,
+# and well after it was started, begin the next chord if they are held
+# on for this long after the rest of it is released. This lets fast
+# typists roll from one chord into the next. Set it to 0 to turn this off.
+ROLLOVER_TIME = 0.03
+# Time the key switches are debounced for, in seconds. The cal command
+# chord times each switch and keeps its own debounce time in the
+# non-volatile memory, starting at NVM_DEBOUNCE, which is then used
+# instead.
+DEBOUNCE_TIME = 0.01
+NVM_DEBOUNCE = 0
+# Number of times each key is pressed when calibrating
+CALIBRATION_PRESSES = 5
+# Make this true to act on the first edge from a switch and ignore the
+# bounces after it. The keys have to be polled for this.
+EAGER_DEBOUNCE = False
+# Keymap file made by tools/keymapc.py. The built in layout is used if
+# it isn't there.
+KEYMAP_FILE = "/keymap.bin"
+# Abbreviations made by tools/macroc.py. Nothing is expanded if the file
+# isn't there.
+MACRO_FILE = "/macros.bin"
+# Make this true to light the chord for the most likely next character
+# while typing text. The pred command chord turns this on and off. The
+# prediction starts from the model in PREDICT_FILE, made by
+# tools/ngramc.py, if there is one, and learns from what is typed.
+PREDICT = False
+PREDICT_FILE = "/ngram.bin"
+# Make this true to print how long the keyboard takes to start, from
+# code.py starting to the first scan of the keys
+BOOT_TIMING = False
@@ -0,0 +1,173 @@
+# Two core runtime for the keyboard
+#
+# The scan side samples and debounces the keys and assembles the chords.
+# It runs on the second core of the RP2040, or as a thread on the host,
+# so that slow output on the first core (keyboard reports, the display
+# and the key lights) can't hold up a scan. Completed chords are passed
+# back through an EventQueue, which is safe with one producer and one
+# consumer without a lock.
+#
+# Where there is no _thread module, as in CircuitPython, InlineBackend
+# runs the scan side from the main loop instead, so the same pipeline
+# works everywhere.
+
+import time
+
+try:
+    import _thread
+except ImportError:
+    _thread = None
+
+from picochord.events import EventQueue
+
+
+class ThreadBackend:
+    # Runs the scan side on the second core, or as a thread on the host
+
+    def start(self, side):
+        side.running = True
+        side.stopped = False
+        _thread.start_new_thread(side.run, ())
+
+    def poll(self, side):
+        # the other core is doing the work
+        pass
+
+    def stop(self, side):
+        side.running = False
+        while not side.stopped:
+            time.sleep(0.001)
+
+
+class InlineBackend:
+    # Runs a step of the scan side each time round the main loop
+
+    def start(self, side):
+        side.stopped = True
+
+    def poll(self, side):
+        side.step()
+
+    def stop(self, side):
+        pass
+
+
+def make_backend():
+    if _thread is None:
+        return InlineBackend()
+    return ThreadBackend()
+
+
+class ScanSide:
+
+    def __init__(self, keyboard, scan_wait=0.001, queue_size=16):
+        self.keyboard = keyboard
+        # longest sleep between scans
+        self.scan_wait = scan_wait
+        # completed chords as (bits, chord start ticks)
+        self.chords = EventQueue(queue_size)
+        # and the ticks of the key release that completed each one. These
+        # are put before the chord, so the queues stay in step.
+        self.releases = EventQueue(queue_size)
+        self.running = False
+        self.stopped = True
+        self.pause_requested = False
+        self.paused = False
+
+    def chord_done(self, bits):
+        # Called by the chord assembler on the scan side, just after it
+        # has taken the completing release from the event queue
+        keyboard = self.keyboard
+        self.releases.put(bits, 0, keyboard.events.ticks)
+        self.chords.put(bits, 0, keyboard.chords.chord_ticks)
+
+    def step(self):
+        keyboard = self.keyboard
+        keyboard.update_keys()
+        keyboard.chords.process()
+
+    def run(self):
+        # the loop for the second core
+        while self.running:
+            if self.pause_requested:
+                self.paused = True
+                time.sleep(self.scan_wait)
+                continue
+            self.paused = False
+            self.step()
+            self.keyboard.scanner.wait(self.scan_wait)
+        self.stopped = True
+
+    def pause(self):
+        # Stop scanning until resume(), so the scanner can be changed
+        self.pause_requested = True
+        if not self.stopped:
+            while not self.paused:
+                time.sleep(0.001)
+
+    def resume(self):
+        self.pause_requested = False
+
+
+class SplitRuntime:
+
+    def __init__(self, keyboard, backend=None, idle_wait=0.001):
+        self.keyboard = keyboard
+        if backend is None:
+            backend = make_backend()
+        self.backend = backend
+        self.idle_wait = idle_wait
+        self.side = ScanSide(keyboard)
+        self.running = False
+
+    def start(self):
+        keyboard = self.keyboard
+        # the assembler now hands its chords to the queue
+        keyboard.chords.got_bits = self.side.chord_done
+        keyboard.split = self.side
+        self.backend.start(self.side)
+
+    def stop(self):
+        self.running = False
+        self.backend.stop(self.side)
+        keyboard = self.keyboard
+        keyboard.chords.got_bits = keyboard.got_bits
+        keyboard.split = None
+
+    def take_chords(self):
+        keyboard = self.keyboard
+        queue = self.side.chords
+        releases = self.side.releases
+        while queue.get():
+            releases.get()
+            if keyboard.latency is not None:
+                keyboard.latency.chord_decoded(queue.ticks, releases.ticks)
+            keyboard.act_on_chord(queue.mask)
+
+    def update(self):
+        # one pass of the output side
+        keyboard = self.keyboard
+        self.backend.poll(self.side)
+        keyboard.update_key_cols()
+        self.take_chords()
+        keyboard.flush_output()
+        keyboard.mode_processors[keyboard.mode].update()
+        keyboard.display_scheduler.update()
+        keyboard.pixels.show()
+
+    def idle(self):
+        return len(self.side.chords) == 0 and self.keyboard.idle()
+
+    def run(self):
+        self.start()
+        self.running = True
+        keyboard = self.keyboard
+        while self.running:
+            self.update()
+            if self.side.stopped:
+                # scanning is done here, so it can sleep until a key changes
+                keyboard.wait_if_idle()
+            elif self.idle():
+                if not keyboard.heap_clean:
+                    keyboard.collect_garbage()
+                time.sleep(self.idle_wait)
@@ -0,0 +1,141 @@
+# Fixed rate runtime for the keyboard
+#
+# The plain main loop runs as fast as it can, so the time between scans
+# depends on how long everything else in the loop took. TickRuntime
+# starts a scan at the start of every tick of a fixed period instead,
+# timed from millisecond deadlines. The rest of the work (keyboard
+# output, the mode processor, the display and the key lights) is done
+# in the time left in the tick, each at its own rate. Work that doesn't
+# fit waits for a later tick, and whatever is left of a tick is spent
+# asleep.
+#
+# Each key report waits for the host to take it, so while the ticks are
+# running long output is typed a character at a time to keep each step
+# of it short.
+#
+# A tick that starts a whole period or more late counts as an overrun.
+# The ticks then start again from the current time rather than trying
+# to catch up.
+#
+# The deadlines use ticks_ms(), which returns a small int, as the clock
+# is read several times in every tick. The scanner is sampled on every
+# tick with scan(), so a polled scanner has to be made for the tick rate
+# to debounce the keys over the right time.
+
+from array import array
+import time
+
+from picochord.events import ticks_ms, ticks_ms_add, ticks_ms_diff
+
+
+class TickRuntime:
+
+    def __init__(self, keyboard, scan_rate=1000, pixel_rate=60, display_rate=100):
+        self.keyboard = keyboard
+        # length of a tick in milliseconds
+        self.period = max(1, 1000 // scan_rate)
+        # the jobs done after the scan, and the number of ticks between runs
+        self.jobs = (self.output, self.processor, self.display, self.pixels)
+        self.intervals = array("H", (1, 1, max(1, scan_rate // display_rate),
+            max(1, scan_rate // pixel_rate)))
+        # ticks until each job is due, 0 if it is due now
+        self.waits = array("H", [0] * len(self.jobs))
+        # the job to try first in the next tick, so that all get a turn
+        self.next_job = 0
+        self.deadline = ticks_ms()
+        self.running = False
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.ticks = 0
+        # ticks that started late, the periods lost by them, and jobs put
+        # off because their tick had run out of time
+        self.overruns = 0
+        self.missed = 0
+        self.deferred = 0
+
+    # the jobs
+
+    def output(self):
+        keyboard = self.keyboard
+        if keyboard.output_waiting():
+            keyboard.flush_output()
+
+    def processor(self):
+        keyboard = self.keyboard
+        keyboard.mode_processors[keyboard.mode].update()
+
+    def display(self):
+        self.keyboard.display_scheduler.update()
+
+    def pixels(self):
+        keyboard = self.keyboard
+        keyboard.update_key_cols()
+        keyboard.pixels.show()
+
+    def start(self):
+        keyboard = self.keyboard
+        self.chunk_size = keyboard.output_chunk_size
+        keyboard.output_chunk_size = 1
+        self.deadline = ticks_ms()
+        self.running = True
+
+    def tick(self):
+        # Scan, do what jobs fit in the tick and sleep until the next one
+        keyboard = self.keyboard
+        period = self.period
+        now = ticks_ms()
+        late = ticks_ms_diff(now, self.deadline)
+        if late >= period:
+            self.overruns = self.overruns + 1
+            self.missed = self.missed + late // period
+            self.deadline = now
+        self.deadline = ticks_ms_add(self.deadline, period)
+        self.ticks = self.ticks + 1
+        keyboard.scan_keys()
+        keyboard.chords.process()
+        waits = self.waits
+        count = len(waits)
+        for index in range(count):
+            if waits[index]:
+                waits[index] = waits[index] - 1
+        index = self.next_job
+        for _ in range(count):
+            if waits[index] == 0:
+                if ticks_ms_diff(self.deadline, ticks_ms()) <= 0:
+                    # out of time, the rest go first next tick
+                    self.deferred = self.deferred + 1
+                    break
+                self.jobs[index]()
+                waits[index] = self.intervals[index]
+            index = index + 1
+            if index == count:
+                index = 0
+        self.next_job = index
+        wait = ticks_ms_diff(self.deadline, ticks_ms())
+        if wait <= 0:
+            return
+        if keyboard.idle():
+            # nothing to do until a key changes. The scanner waits for a
+            # key event, or for its next sample if it is polled, which
+            # may be longer than a tick. If so the ticks start again
+            # afterwards, and if not the rest of the tick is slept.
+            keyboard.wait_if_idle()
+            wait = ticks_ms_diff(self.deadline, ticks_ms())
+            if wait <= 0:
+                self.deadline = ticks_ms()
+                return
+        time.sleep(wait / 1000)
+
+    def run(self):
+        self.start()
+        while self.running:
+            self.tick()
+
+    def stop(self):
+        self.running = False
+        self.keyboard.output_chunk_size = self.chunk_size
+
+    def report(self):
+        print("Ticks:", self.ticks, "overruns:", self.overruns,
+            "missed:", self.missed, "deferred:", self.deferred)
@@ -0,0 +1,10 @@
+# Host side simulation of the PICO Chord keyboard hardware
+#
+# Nothing in here is copied onto the PICO. It lets the keyboard code
+# be run and benchmarked with ordinary Python on a desktop machine:
+#
+#   python -m sim.bench
+#
+# sim.firmware.Simulator builds the whole keyboard from picochord/keyboard.py on top
+# of stand-in device modules, with scripted switches and recorded pixel,
+# display and keyboard output.
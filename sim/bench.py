@@ -0,0 +1,501 @@
+# Host benchmarks for the chord keyboard code
+#
+# Run with: python -m sim.bench [name ...]
+
+import sys
+import threading
+import time
+
+from picochord import keymap
+from picochord.dispatch import compile_state_tables
+from picochord.events import ChordAssembler, KEY_DOWN, KEY_UP
+from picochord.rollover import RolloverAssembler
+from picochord.scanner import ChordScanner
+from sim.bounce import bouncy_samples
+from sim.pins import FakePinBank
+from sim.replay import replay
+
+
+def timed(label, count, function):
+    start = time.perf_counter()
+    function(count)
+    elapsed = time.perf_counter() - start
+    print("{0:32} {1:10.0f} per second".format(label, count / elapsed))
+
+
+def bench_scan(count=200000):
+    # Scans per second for the bitmask scanner, with keys changing
+    # every few samples so the counters do some work.
+    bank = FakePinBank()
+    scanner = ChordScanner(bank)
+
+    def run(count):
+        for i in range(count):
+            if i & 7 == 0:
+                bank.levels = (i >> 3) & 63
+            scanner.scan()
+
+    timed("ChordScanner.scan", count, run)
+
+
+def bench_dispatch(count=200000):
+    # Chord lookups per second through the decode dictionaries, as
+    # got_bits used to do it, and through the compiled tables.
+    upper_state = 0
+    state_decodes = (keymap.TEXT_DECODE, keymap.TEXT_DECODE,
+        keymap.NUM_DECODE, keymap.SYM_DECODE)
+    sent = []
+    action = lambda x: None
+    commands = {}
+    for bits in (1, 13, 17, 21, 25, 29, 44, 57, 33, 49):
+        commands[bits] = ("cmd", action, "command")
+
+    def dict_path(count):
+        for i in range(count):
+            state = i & 3
+            bits = i & 63
+            decode = state_decodes[state]
+            if not bits in decode:
+                if bits in commands:
+                    commands[bits][1](None)
+                continue
+            key = decode[bits]
+            if state == upper_state:
+                key = key.upper()
+            sent.append(key)
+        sent.clear()
+
+    tables = compile_state_tables(state_decodes, commands, upper_state)
+
+    def table_path(count):
+        for i in range(count):
+            entry = tables[i & 3][i & 63]
+            if entry is None:
+                continue
+            if type(entry) is not str:
+                entry[1](None)
+                continue
+            sent.append(entry)
+        sent.clear()
+
+    timed("dict decode", count, dict_path)
+    timed("compiled table decode", count, table_path)
+
+
+def bench_idle(seconds=1.0, presses=20):
+    # CPU time used by an idle keyboard and the time from a key being
+    # pressed to the keyboard seeing it, for each scanning backend
+    from sim.firmware import Simulator
+
+    for use_keypad in (False, True):
+        if use_keypad:
+            name = "keypad"
+        else:
+            name = "polling"
+        sim = Simulator(use_keypad=use_keypad)
+        # let the hello message finish
+        sim.keyboard.display_scheduler.cancel()
+        sim.run_for(0.05)
+        cpu_start = time.process_time()
+        loops = sim.run_for(seconds, wait=True)
+        cpu = time.process_time() - cpu_start
+        print("{0:8} idle: {1:6.1f}% CPU, {2:7.0f} loops per second".format(
+            name, cpu * 100 / seconds, loops / seconds))
+
+        # press a key from another thread while the keyboard sleeps
+        scanner = sim.keyboard.scanner
+        total = 0
+        worst = 0
+        for _ in range(presses):
+            pressed_at = []
+
+            def press():
+                pressed_at.append(time.monotonic())
+                sim.press(2)
+
+            timer = threading.Timer(0.02, press)
+            timer.start()
+            while not scanner.any_down():
+                sim.keyboard.update()
+                sim.keyboard.wait_if_idle()
+            latency = time.monotonic() - pressed_at[0]
+            total = total + latency
+            if latency > worst:
+                worst = latency
+            timer.join()
+            sim.release(2)
+            while scanner.any_down():
+                sim.keyboard.update()
+            # deal with the chord so the keyboard goes idle again
+            sim.run_for(0.01)
+        print("{0:8} wake: {1:6.2f} ms average, {2:6.2f} ms worst".format(
+            name, total * 1000 / presses, worst * 1000))
+
+
+def bench_help(report_time=0.001):
+    # Time to type the whole help when the host takes one report
+    # every report_time seconds
+    from sim.firmware import Simulator
+
+    sim = Simulator()
+    sim.hid.report_time = report_time
+    sim.keyboard.display_scheduler.cancel()
+    sim.run_for(0.05)
+    sim.keyboard.display_scheduler.delay = 0
+    sim.chord(33)
+    start = time.monotonic()
+    sim.run_until(lambda: sim.keyboard.mode == sim.firmware.PicoChord.TEXT_MODE, timeout=600)
+    elapsed = time.monotonic() - start
+    text = sim.typed()
+    print("help: {0} characters, {1} reports in {2:.1f} seconds".format(
+        len(text), len(sim.hid.reports), elapsed))
+
+
+def scan_gaps(runtime_name, seconds=2.0, report_time=0.001):
+    # Times between scans of the keys while the help is being typed,
+    # with the scanning in the main loop ("loop"), on a scan thread
+    # ("split") or at a fixed rate ("ticks")
+    from picochord.splitcore import SplitRuntime, ThreadBackend
+    from picochord.ticks import TickRuntime
+    from sim.firmware import Simulator
+
+    sim = Simulator(use_keypad=False)
+    keyboard = sim.keyboard
+    keyboard.display_scheduler.cancel()
+    sim.run_for(0.05)
+    keyboard.display_scheduler.delay = 0
+    sim.hid.report_time = report_time
+    sim.chord(33)
+    times = []
+    scanner = keyboard.scanner
+    if runtime_name == "ticks":
+        # sampled on every tick, as make_scanner does with USE_TICKS
+        scanner = ChordScanner(scanner.bank, interval=0.01, scan_rate=1000)
+        keyboard.scanner = scanner
+    bank = scanner.bank
+    read = bank.read
+
+    def timed_read():
+        times.append(time.perf_counter())
+        return read()
+
+    bank.read = timed_read
+    runtime = None
+    if runtime_name == "split":
+        runtime = SplitRuntime(keyboard, ThreadBackend())
+        runtime.start()
+        update = runtime.update
+    elif runtime_name == "ticks":
+        runtime = TickRuntime(keyboard, scan_rate=1000)
+        runtime.start()
+        update = runtime.tick
+    else:
+        update = keyboard.update
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        update()
+    if runtime is not None:
+        runtime.stop()
+    if runtime_name == "ticks":
+        runtime.report()
+    gaps = sorted((times[i] - times[i - 1]) * 1000 for i in range(1, len(times)))
+    return gaps, len(sim.hid.reports)
+
+
+def print_gaps(name, gaps, reports):
+    print("{0:12} {1:5} scans, gap {2:6.2f} ms median, {3:7.2f} ms 99%, "
+        "{4:7.2f} ms worst, {5} reports".format(name, len(gaps) + 1,
+        gaps[len(gaps) // 2], gaps[len(gaps) * 99 // 100], gaps[-1], reports))
+
+
+def bench_split(seconds=2.0):
+    # Scan jitter under heavy output, with and without the split
+    for runtime_name, name in (("loop", "single loop"), ("split", "scan thread")):
+        gaps, reports = scan_gaps(runtime_name, seconds)
+        print_gaps(name, gaps, reports)
+
+
+def bench_ticks(seconds=2.0):
+    # Scan jitter under heavy output, in the plain loop and at a fixed
+    # rate, and the scans made when idle
+    for runtime_name, name in (("loop", "single loop"), ("ticks", "fixed ticks")):
+        gaps, reports = scan_gaps(runtime_name, seconds)
+        print_gaps(name, gaps, reports)
+
+
+def rolled_events(text, hold=0.045, overlap=0.015, gap=0.01):
+    # Key events for typing text with each chord pressed overlap seconds
+    # before the last one is released, as a fast typist does. A chord
+    # that shares a key with the one before has to wait for it to go up.
+    chars = {}
+    for bits, ch in keymap.TEXT_DECODE.items():
+        chars[ch] = bits
+    events = []
+    now = 0
+    held = 0
+    for ch in text:
+        bits = chars[ch]
+        if held & bits:
+            now = now + int(overlap * 1000)
+            events.append((now, held, KEY_UP))
+            now = now + int(gap * 1000)
+            held = 0
+        events.append((now, bits, KEY_DOWN))
+        if held:
+            now = now + int(overlap * 1000)
+            events.append((now, held, KEY_UP))
+        now = now + int(hold * 1000)
+        held = bits
+    events.append((now, held, KEY_UP))
+    return events
+
+
+def bench_rollover(text="the quick brown fox jumps over the lazy dog"):
+    # Characters that survive overlapped typing with and without the
+    # rollover assembler
+    events = rolled_events(text)
+    for assembler_class in (ChordAssembler, RolloverAssembler):
+        chords, queue = replay(events, assembler_class=assembler_class)
+        typed = "".join(keymap.TEXT_DECODE.get(bits, "?") for bits in chords)
+        print("{0:18} {1:3} of {2} characters: {3}".format(
+            assembler_class.__name__, len(typed), len(text),
+            "correct" if typed == text else repr(typed)))
+
+
+def debounce_latency(scanner, samples, edges, every=1):
+    # Feeds samples to the scanner, every'th one only for a scanner with
+    # a slower sample rate. Returns the average and worst time in ms from
+    # the first edge of a change to the scanner reporting it, and the
+    # number of changes the scanner reported that didn't happen.
+    reported = []
+    for now in range(0, len(samples), every):
+        if every == 1:
+            toggle = scanner.debounce(samples[now], now)
+        else:
+            toggle = scanner.debounce(samples[now])
+        if toggle:
+            reported.append((now, toggle))
+    total = 0
+    worst = 0
+    found = 0
+    for start, bit, down in edges:
+        for now, toggle in reported:
+            if now >= start and toggle & bit:
+                delay = now - start
+                total = total + delay
+                worst = max(worst, delay)
+                found = found + 1
+                break
+    changes = 0
+    for now, toggle in reported:
+        changes = changes + bin(toggle).count("1")
+    return total / len(edges), worst, changes - found
+
+
+def bench_debounce(bounce_ms=(1, 2, 2, 3, 5, 8)):
+    # Latency from a switch changing to the scanner reporting it, for the
+    # vertical counter, one interval for every key, calibrated per key
+    # intervals and calibrated eager debouncing
+    from picochord.debounce import TunedScanner
+
+    samples, edges = bouncy_samples(bounce_ms)
+    bank = FakePinBank()
+    counter = ChordScanner(bank, interval=0.01)
+    fixed = TunedScanner(bank, [10] * 6)
+    calibrate = TunedScanner(bank, [10] * 6)
+    calibrate.start_calibration()
+    training, _ = bouncy_samples(bounce_ms, presses=5, seed=2)
+    for now in range(len(training)):
+        calibrate.debounce(training[now], now)
+    intervals = calibrate.finish_calibration()
+    print("calibrated intervals:", list(intervals), "ms")
+    tuned = TunedScanner(bank, intervals)
+    eager = TunedScanner(bank, intervals, eager=True)
+    runs = (
+        ("vertical counter", counter, counter.sample_ms),
+        ("fixed 10 ms", fixed, 1),
+        ("per key", tuned, 1),
+        ("per key eager", eager, 1),
+    )
+    for name, scanner, every in runs:
+        average, worst, spurious = debounce_latency(scanner, samples, edges, every)
+        print("{0:18} {1:5.1f} ms average, {2:3} ms worst, {3} false changes".format(
+            name, average, worst, spurious))
+
+
+def bench_macros(count=2000, lookups=200000):
+    # Size of a trie of count synthetic abbreviations against the same
+    # macros in a dictionary, and characters followed per second
+    import random
+    import tracemalloc
+    from picochord.macros import MacroExpander
+    from tools.macroc import compile_macros
+
+    rand = random.Random(1)
+    macros = {}
+    while len(macros) < count:
+        length = rand.randint(2, 6)
+        trigger = "".join(rand.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(length))
+        macros[trigger] = "expansion of " + trigger
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    copy = {}
+    for trigger in macros:
+        copy["".join(list(trigger))] = "".join(list(macros[trigger]))
+    dict_bytes = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    data = compile_macros(macros)
+    print("{0} macros: {1} bytes as a dictionary, {2} bytes as a trie".format(
+        count, dict_bytes, len(data)))
+    expander = MacroExpander(data)
+    words = list(macros)[:100]
+    text = " ".join(words) + " "
+
+    def run(count):
+        pos = 0
+        for _ in range(count):
+            expander.typed(text[pos])
+            pos = pos + 1
+            if pos == len(text):
+                pos = 0
+
+    timed("MacroExpander.typed", lookups, run)
+
+
+def bench_predict(count=200000):
+    # Characters learned and predictions made per second
+    from picochord.predict import NgramPredictor
+
+    predictor = NgramPredictor()
+    text = "the quick brown fox jumps over the lazy dog "
+
+    def run(count):
+        pos = 0
+        for _ in range(count):
+            predictor.typed(text[pos])
+            predictor.predict()
+            pos = pos + 1
+            if pos == len(text):
+                pos = 0
+
+    timed("NgramPredictor typed and predict", count, run)
+    size = len(predictor.pairs) + len(predictor.triples) + len(predictor.best_pair) + \
+        len(predictor.best_triple) + len(predictor.triple_seen)
+    print("prediction tables: {0} bytes".format(size))
+
+
+def bench_boot():
+    # Start up steps of the keyboard program, as main() reports them
+    import time
+    start_ns = time.monotonic_ns()
+    from picochord.boottime import BootTimer
+    from sim.firmware import load_firmware
+
+    firmware = load_firmware()
+    timer = BootTimer(start_ns)
+    timer.mark("imports")
+    keyboard = firmware.make_keyboard()
+    timer.mark("keyboard built")
+    keyboard.update()
+    timer.mark("first scan")
+    timer.report()
+
+
+def display_traffic(frames, text, message):
+    # I2C transactions and bytes sent to the display while typing text and
+    # scrolling a message, with or without the display frame
+    from picochord.display import DisplayScheduler
+    from sim.display import FakeSeg14x4
+    from sim.firmware import Simulator
+
+    sim = Simulator()
+    keyboard = sim.keyboard
+    if not frames:
+        # the display writes every change itself, as it used to
+        keyboard.display = FakeSeg14x4(sim.i2c)
+        keyboard.display_scheduler = DisplayScheduler(keyboard.display)
+    keyboard.display_scheduler.cancel()
+    sim.run_for(0.05)
+    sim.i2c.reset_counters()
+    sim.type_text(text)
+    keyboard.display_scheduler.delay = 0.01
+    keyboard.scroll_text(message)
+    sim.run_until(lambda: not keyboard.display_scheduler.busy and
+        not keyboard.display_scheduler.dirty)
+    return sim.i2c.transactions, sim.i2c.bytes_written
+
+
+def bench_display(text="hello world", message="Debounce 5 ms"):
+    for frames in (False, True):
+        transactions, written = display_traffic(frames, text, message)
+        if frames:
+            name = "display frame"
+        else:
+            name = "auto write"
+        print("{0:14} {1:4} I2C writes, {2:5} bytes".format(name, transactions, written))
+
+
+def bench_glyphs(count=100000):
+    # Time to show a typed character on the display by printing it, from
+    # the glyph cache, and by adding it to the typed history, each the
+    # way the keyboard does it after a chord
+    from picochord.display import DisplayScheduler
+    from picochord.glyphs import GlyphCache
+    from picochord.history import TypedHistory
+    from sim.display import FakeSeg14x4
+
+    display = FakeSeg14x4(auto_write=False)
+    text = "the quick brown fox jumps over the lazy dog"
+    # the calls record grows with every print, so it isn't kept here
+    display.record = lambda name, value: None
+    printer = DisplayScheduler(display)
+
+    def printed(count):
+        for i in range(count):
+            printer.show(text[i % len(text)])
+
+    scheduler = DisplayScheduler(display, glyphs=GlyphCache(display))
+
+    def cached(count):
+        for i in range(count):
+            scheduler.show(text[i % len(text)])
+
+    history = TypedHistory()
+
+    def typed(count):
+        for i in range(count):
+            code = ord(text[i % len(text)])
+            history.add_code(code)
+            scheduler.history_typed(history, code)
+
+    timed("fill and print", count, printed)
+    timed("glyph cache show", count, cached)
+    timed("typed history", count, typed)
+
+
+benchmarks = {
+    "scan": bench_scan,
+    "dispatch": bench_dispatch,
+    "idle": bench_idle,
+    "help": bench_help,
+    "rollover": bench_rollover,
+    "debounce": bench_debounce,
+    "macros": bench_macros,
+    "predict": bench_predict,
+    "boot": bench_boot,
+    "split": bench_split,
+    "display": bench_display,
+    "glyphs": bench_glyphs,
+    "ticks": bench_ticks,
+}
+
+
+def main(names):
+    if not names:
+        names = benchmarks.keys()
+    for name in names:
+        benchmarks[name]()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
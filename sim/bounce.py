@@ -0,0 +1,38 @@
+# Synthetic switch bounce
+#
+# Makes the raw readings a bank of bouncing switches would give when
+# sampled once a millisecond, for feeding into the scanners.
+
+import random
+
+
+def bouncy_samples(bounce_ms, presses=20, hold_ms=60, seed=1):
+    # Returns (samples, edges). samples is a list of raw masks, one per
+    # millisecond. Each key is pressed and released presses times, one
+    # key at a time, and chatters for its entry in bounce_ms, indexed by
+    # bit number, after every edge. edges lists (sample, bit, down) for the
+    # first edge of each press and release.
+    rand = random.Random(seed)
+    samples = []
+    edges = []
+    level = 0
+    for _ in range(presses):
+        for bit_number in range(len(bounce_ms)):
+            bit = 1 << bit_number
+            for down in (True, False):
+                edges.append((len(samples), bit, down))
+                for step in range(hold_ms):
+                    if down:
+                        settled = level | bit
+                    else:
+                        settled = level & ~bit
+                    if 0 < step < bounce_ms[bit_number] and rand.random() < 0.5:
+                        # the contacts are still bouncing
+                        samples.append(settled ^ bit)
+                    else:
+                        samples.append(settled)
+                if down:
+                    level = level | bit
+                else:
+                    level = level & ~bit
+    return samples, edges
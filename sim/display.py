@@ -0,0 +1,130 @@
+# Fake HT16K33 14 segment display for the host
+#
+# Records every call with the time it was made so that display output
+# and marquee timing can be checked. Like the real Seg14x4 it keeps the
+# display RAM in a buffer and, with auto_write on, sends the whole
+# buffer over the I2C bus after every fill() and print(), so the bus
+# counts show how much traffic the display makes.
+#
+# The segment patterns are stand-ins, not the real font: each printed
+# character is stored as its character code, so text can read back what
+# is showing however the buffer was written.
+
+import time
+
+# the decimal point segment in the high byte of a digit
+DECIMAL_POINT = 0x40
+
+
+class FakeI2CDevice:
+    # the parts of adafruit_bus_device.I2CDevice the display uses
+
+    def __init__(self, i2c, device_address):
+        self.i2c = i2c
+        self.device_address = device_address
+
+    def __enter__(self):
+        # the real device spins until it gets the bus
+        while not self.i2c.try_lock():
+            pass
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.i2c.unlock()
+        return False
+
+    def write(self, buf, *, start=0, end=None):
+        self.i2c.writeto(self.device_address, buf, start=start, end=end)
+
+
+class FakeSeg14x4:
+
+    def __init__(self, i2c=None, address=0x70, auto_write=True, chars_per_display=4):
+        self.chars = chars_per_display
+        self.calls = []
+        # the RAM address byte and then the 16 bytes of display RAM
+        self._buffer = bytearray(17)
+        self._auto_write = auto_write
+        if i2c is None:
+            self.i2c_device = None
+        else:
+            self.i2c_device = FakeI2CDevice(i2c, address)
+        self.show()
+
+    def record(self, name, value):
+        self.calls.append((time.monotonic(), name, value))
+
+    @property
+    def text(self):
+        # the characters in the display buffer
+        result = ""
+        for index in range(self.chars):
+            pattern = self._buffer[index * 2 + 1] | (self._buffer[index * 2 + 2] << 8)
+            pattern = pattern & ~(DECIMAL_POINT << 8)
+            if pattern == 0:
+                result = result + " "
+            else:
+                result = result + chr(pattern)
+        return result
+
+    @property
+    def auto_write(self):
+        return self._auto_write
+
+    @auto_write.setter
+    def auto_write(self, auto_write):
+        self._auto_write = auto_write
+
+    def show(self):
+        if self.i2c_device is None:
+            return
+        with self.i2c_device:
+            self.i2c_device.write(self._buffer)
+
+    def fill(self, color):
+        self.record("fill", color)
+        if color:
+            fill = 0xFF
+        else:
+            fill = 0
+        for pos in range(1, len(self._buffer)):
+            self._buffer[pos] = fill
+        if self._auto_write:
+            self.show()
+
+    def _put(self, ch, index):
+        pattern = ord(ch)
+        self._buffer[index * 2 + 1] = pattern & 0xFF
+        self._buffer[index * 2 + 2] = (pattern >> 8) & 0xFF
+
+    def _push(self, ch):
+        # printed characters are pushed in from the right
+        buffer = self._buffer
+        if ch == ".":
+            buffer[self.chars * 2] = buffer[self.chars * 2] | DECIMAL_POINT
+            return
+        buffer[1:self.chars * 2 - 1] = buffer[3:self.chars * 2 + 1]
+        self._put(ch, self.chars - 1)
+
+    def print(self, value):
+        value = str(value)
+        self.record("print", value)
+        for ch in value:
+            self._push(ch)
+        if self._auto_write:
+            self.show()
+
+    def marquee(self, text, delay=0.25, loop=True):
+        self.record("marquee", text)
+        self.fill(0)
+        for ch in text:
+            self.print(ch)
+            time.sleep(delay)
+
+    def frames(self):
+        # the (time, text) pairs for every character printed
+        result = []
+        for when, name, value in self.calls:
+            if name == "print":
+                result.append((when, value))
+        return result
@@ -0,0 +1,145 @@
+# Run the keyboard firmware on the host
+#
+# install() puts the stand-in device modules in sim/modules in front of
+# everything else on the module path. Simulator then loads the keyboard
+# program in picochord/keyboard.py and builds a PicoChord without calling
+# run(), so the test code drives the
+# main loop itself and controls the switches.
+
+import asyncio
+import importlib.util
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MODULES = os.path.join(ROOT, "sim", "modules")
+
+
+def install():
+    if MODULES not in sys.path:
+        sys.path.insert(0, MODULES)
+    if ROOT not in sys.path:
+        sys.path.insert(1, ROOT)
+
+
+def load_firmware(name="picochord_firmware"):
+    # The program is loaded afresh each time, so that the settings changed
+    # for one simulator don't carry over to the next
+    install()
+    spec = importlib.util.spec_from_file_location(name,
+        os.path.join(ROOT, "picochord", "keyboard.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class Simulator:
+
+    def __init__(self, right_handed=True, use_keypad=True):
+        self.firmware = load_firmware()
+        self.firmware.RIGHT_HANDED = right_handed
+        self.firmware.USE_KEYPAD = use_keypad
+        import usb_hid
+        self.hid = usb_hid.devices[0]
+        self.hid.clear()
+        self.keyboard = self.firmware.make_keyboard()
+        # the devices behind the keyboard
+        self.pixels = self.keyboard.pixels.pixels
+        self.display = self.keyboard.display
+        self.i2c = self.keyboard.i2c
+
+    def set_keys(self, bits):
+        # Set the switches so that exactly the keys in bits are held down
+        for switch in self.keyboard.key_switches:
+            switch.pin.value = (bits & switch.bit) == 0
+
+    def held_keys(self):
+        bits = 0
+        for switch in self.keyboard.key_switches:
+            if not switch.pin.value:
+                bits = bits | switch.bit
+        return bits
+
+    def press(self, bits):
+        self.set_keys(self.held_keys() | bits)
+
+    def release(self, bits):
+        self.set_keys(self.held_keys() & ~bits)
+
+    def step(self, count=1):
+        for _ in range(count):
+            self.keyboard.update()
+
+    def run_for(self, seconds, wait=False):
+        # Run the main loop for a while. Returns the number of loops. If
+        # wait is true the loop sleeps when idle, as run() does.
+        end = time.monotonic() + seconds
+        count = 0
+        while time.monotonic() < end:
+            self.keyboard.update()
+            if wait:
+                self.keyboard.wait_if_idle()
+            count = count + 1
+        return count
+
+    def run_until(self, condition, timeout=1.0):
+        # Run the main loop until condition() is true. Returns the number
+        # of loops, or raises TimeoutError.
+        end = time.monotonic() + timeout
+        count = 0
+        while not condition():
+            if time.monotonic() > end:
+                raise TimeoutError("Simulated keyboard did not respond")
+            self.keyboard.update()
+            count = count + 1
+        return count
+
+    def chord(self, bits, hold=0.03):
+        # Press and release a chord. Each edge is held for at least hold
+        # seconds and until the scanner has seen it.
+        # the keyboard can change its scanner, so look it up each time
+        keyboard = self.keyboard
+        self.press(bits)
+        self.run_for(hold)
+        self.run_until(lambda: keyboard.scanner.state & bits == bits)
+        self.release(bits)
+        self.run_for(hold)
+        self.run_until(lambda: keyboard.scanner.state & bits == 0)
+
+    def type_text(self, text, hold=0.03):
+        # Type text a chord at a time, without changing keyboard state
+        for ch in text:
+            char_def = self.keyboard.lookup_character(ch)
+            if char_def is None:
+                raise ValueError("No chord for " + repr(ch))
+            self.chord(char_def[0], hold)
+
+    def run_async(self, script):
+        # Run the keyboard under the asyncio runtime while the script
+        # coroutine function plays the part of the user. The script is
+        # passed the simulator.
+        from picochord.runtime import AsyncRuntime
+        runtime = AsyncRuntime(self.keyboard)
+        runtime.run(script(self))
+        return runtime
+
+    async def chord_async(self, bits, hold=0.03):
+        # chord() for scripts run by run_async()
+        scanner = self.keyboard.scanner
+        self.press(bits)
+        await asyncio.sleep(hold)
+        while scanner.state & bits != bits:
+            await asyncio.sleep(0.001)
+        self.release(bits)
+        await asyncio.sleep(hold)
+        while scanner.state & bits != 0:
+            await asyncio.sleep(0.001)
+
+    async def type_text_async(self, text, hold=0.03):
+        for ch in text:
+            await self.chord_async(self.keyboard.lookup_character(ch)[0], hold)
+
+    def typed(self):
+        # The text the host has received so far
+        return self.hid.typed(self.firmware.KeyboardLayoutUK.ASCII_TO_KEYCODE)
@@ -0,0 +1,46 @@
+# Fake USB HID keyboard device for the host
+#
+# Records every report sent so output can be checked and timed.
+
+import time
+
+
+class FakeHidDevice:
+
+    def __init__(self, usage_page=0x01, usage=0x06, report_time=0):
+        self.usage_page = usage_page
+        self.usage = usage
+        # seconds the host takes to accept a report, 0 for no delay
+        self.report_time = report_time
+        self.reports = []
+        self.times = []
+
+    def send_report(self, report, report_id=None):
+        if self.report_time:
+            time.sleep(self.report_time)
+        self.reports.append(bytes(report))
+        self.times.append(time.monotonic())
+
+    def clear(self):
+        self.reports = []
+        self.times = []
+
+    def typed(self, keycodes):
+        # Decode the recorded reports back into text using a layout
+        # ASCII_TO_KEYCODE table, the way a host would
+        lookup = {}
+        for code in range(len(keycodes) - 1, -1, -1):
+            if keycodes[code]:
+                lookup[keycodes[code]] = chr(code)
+        text = []
+        held = set()
+        for report in self.reports:
+            shift = report[0] & 0x22
+            keys = set(k for k in report[2:] if k)
+            for key in keys - held:
+                flag = 0x80 if shift else 0
+                ch = lookup.get(key | flag)
+                if ch is not None:
+                    text.append(ch)
+            held = keys
+        return "".join(text)
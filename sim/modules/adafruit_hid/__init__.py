@@ -0,0 +1,14 @@
+# Stand-in for the adafruit_hid package. The library in lib is only
+# shipped as .mpy files, apart from the UK layout, so the compiled parts
+# are replaced here and the layout is loaded from lib.
+
+import os
+
+__path__.append(os.path.join(os.path.dirname(__file__), "..", "..", "..", "lib", "adafruit_hid"))
+
+
+def find_device(devices, *, usage_page, usage):
+    for device in devices:
+        if device.usage_page == usage_page and device.usage == usage:
+            return device
+    raise ValueError("Could not find matching HID device.")
@@ -0,0 +1,28 @@
+# Stand-in for adafruit_hid.keyboard_layout_base
+
+from .keycode import Keycode
+
+
+class KeyboardLayoutBase:
+
+    SHIFT_FLAG = 0x80
+    ASCII_TO_KEYCODE = b""
+
+    def __init__(self, keyboard):
+        self.keyboard = keyboard
+
+    def write(self, string):
+        for char in string:
+            self.keyboard.press(*self.keycodes(char))
+            self.keyboard.release_all()
+
+    def keycodes(self, char):
+        code = ord(char)
+        keycode = 0
+        if code < len(self.ASCII_TO_KEYCODE):
+            keycode = self.ASCII_TO_KEYCODE[code]
+        if keycode == 0:
+            raise ValueError("No keycode available for character.")
+        if keycode & self.SHIFT_FLAG:
+            return (Keycode.SHIFT, keycode & ~self.SHIFT_FLAG)
+        return (keycode,)
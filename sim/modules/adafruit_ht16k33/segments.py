@@ -0,0 +1,3 @@
+# Stand-in for adafruit_ht16k33.segments
+
+from sim.display import FakeSeg14x4 as Seg14x4
@@ -0,0 +1,19 @@
+# Stand-in for the board module of a Raspberry Pi PICO
+
+
+class Pin:
+    # value is the level on the pin, pins float high through the pull ups
+    def __init__(self, name):
+        self.name = name
+        self.value = True
+
+    def __repr__(self):
+        return "board." + self.name
+
+
+for _number in range(29):
+    globals()["GP" + str(_number)] = Pin("GP" + str(_number))
+
+LED = GP25
+SDA = GP0
+SCL = GP1
@@ -0,0 +1,89 @@
+# Stand-in for the keypad module
+#
+# The real module scans the keys in the background. Here the pins are
+# scanned whenever the event queue is looked at, which gives the same
+# events to the code using it.
+
+import time
+
+
+class Event:
+
+    def __init__(self, key_number=0, pressed=True, timestamp=None):
+        self.key_number = key_number
+        self.pressed = pressed
+        self.released = not pressed
+        self.timestamp = timestamp
+
+
+class EventQueue:
+
+    def __init__(self, keys, max_events):
+        self.keys = keys
+        self.max_events = max_events
+        self.queue = []
+        self.overflowed = False
+
+    def put(self, key_number, pressed):
+        if len(self.queue) >= self.max_events:
+            self.overflowed = True
+            return
+        self.queue.append((key_number, pressed, int(time.monotonic() * 1000)))
+
+    def __len__(self):
+        self.keys.scan()
+        return len(self.queue)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def get_into(self, event):
+        self.keys.scan()
+        if not self.queue:
+            return False
+        key_number, pressed, timestamp = self.queue.pop(0)
+        event.key_number = key_number
+        event.pressed = pressed
+        event.released = not pressed
+        event.timestamp = timestamp
+        return True
+
+    def get(self):
+        event = Event()
+        if self.get_into(event):
+            return event
+        return None
+
+    def clear(self):
+        self.queue = []
+        self.overflowed = False
+
+
+class Keys:
+
+    def __init__(self, pins, *, value_when_pressed, pull=True, interval=0.02, max_events=64):
+        self.pins = tuple(pins)
+        self.value_when_pressed = value_when_pressed
+        self.interval = interval
+        # keys start off released, so held keys give press events
+        self.current = [False] * len(self.pins)
+        self.events = EventQueue(self, max_events)
+        self.scans = 0
+
+    @property
+    def key_count(self):
+        return len(self.pins)
+
+    def scan(self):
+        self.scans = self.scans + 1
+        for key_number in range(len(self.pins)):
+            pressed = self.pins[key_number].value == self.value_when_pressed
+            if pressed != self.current[key_number]:
+                self.current[key_number] = pressed
+                self.events.put(key_number, pressed)
+
+    def reset(self):
+        self.current = [False] * len(self.pins)
+
+    def deinit(self):
+        pass
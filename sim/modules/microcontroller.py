@@ -0,0 +1,6 @@
+# Stand-in for the microcontroller module
+#
+# nvm is the non-volatile memory. Erased flash reads as all ones. It is
+# kept for as long as the host program runs.
+
+nvm = bytearray(b"\xff" * 4096)
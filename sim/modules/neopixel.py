@@ -0,0 +1,46 @@
+# Stand-in for the neopixel library. Every frame shown is recorded.
+
+import time
+
+RGB = "RGB"
+GRB = "GRB"
+
+
+class NeoPixel:
+
+    def __init__(self, pin, n, *, bpp=3, brightness=1.0, auto_write=True, pixel_order=None):
+        self.pin = pin
+        self.n = n
+        self.auto_write = auto_write
+        self.brightness = brightness
+        self.values = [(0, 0, 0)] * n
+        # (time, colours) for every frame sent to the pixels
+        self.frames = []
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, index):
+        return self.values[index]
+
+    def __setitem__(self, index, col):
+        if isinstance(col, int):
+            col = ((col >> 16) & 0xFF, (col >> 8) & 0xFF, col & 0xFF)
+        self.values[index] = tuple(col)
+        if self.auto_write:
+            self.show()
+
+    def fill(self, col):
+        auto_write = self.auto_write
+        self.auto_write = False
+        for index in range(self.n):
+            self[index] = col
+        self.auto_write = auto_write
+        if auto_write:
+            self.show()
+
+    def show(self):
+        self.frames.append((time.monotonic(), tuple(self.values)))
+
+    def deinit(self):
+        pass
@@ -0,0 +1,5 @@
+# Stand-in for usb_hid with a single recording keyboard device
+
+from sim.hid import FakeHidDevice
+
+devices = [FakeHidDevice()]
@@ -0,0 +1,31 @@
+# Fake switch pins for running the scanner on the host
+
+
+class FakePin:
+    # Stands in for a pulled up DigitalInOut. value is True when released.
+    def __init__(self):
+        self.value = True
+
+
+class FakePinBank:
+    # Drop in replacement for picochord.scanner.PinBank. The test code
+    # sets levels to the mask of keys that are currently held down.
+    def __init__(self, bits=(1, 2, 4, 8, 16, 32)):
+        self.mask = 0
+        for bit in bits:
+            self.mask = self.mask | bit
+        self.levels = 0
+        self.reads = 0
+
+    def press(self, bits):
+        self.levels = self.levels | bits
+
+    def release(self, bits):
+        self.levels = self.levels & ~bits
+
+    def read(self):
+        self.reads = self.reads + 1
+        return self.levels & self.mask
+
+    def deinit(self):
+        pass
@@ -0,0 +1,33 @@
+# Replay recorded key event streams through the chord assembler
+#
+# An event stream is a sequence of (ticks, mask, edge) tuples, as
+# produced by record(). Replaying one gives the list of chords the
+# keyboard would have acted on.
+
+from picochord.events import ChordAssembler, EventQueue
+
+
+def record(queue):
+    # Drain a live queue into a list of events
+    events = []
+    while queue.get():
+        events.append((queue.ticks, queue.mask, queue.edge))
+    return events
+
+
+def replay(events, queue_size=32, batch=None, assembler_class=ChordAssembler):
+    # Feed the events into a fresh queue and assembler. If batch is given
+    # the consumer only runs after every batch events, which simulates a
+    # consumer that is held up by slow output. assembler_class selects
+    # the chord assembler, for example RolloverAssembler.
+    queue = EventQueue(queue_size)
+    chords = []
+    assembler = assembler_class(queue, chords.append)
+    count = 0
+    for ticks, mask, edge in events:
+        queue.put(mask, edge, ticks)
+        count = count + 1
+        if batch is None or count % batch == 0:
+            assembler.process()
+    assembler.process()
+    return chords, queue
@@ -0,0 +1,11 @@
+# Host tests for the keyboard code
+#
+# Run from the top of the repository with: python -m pytest
+# The tests use the stand-in devices in the sim folder.
+
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
@@ -0,0 +1,21 @@
+# Command chords on the simulated keyboard
+
+from picochord.gcstats import GcMonitor
+from picochord.profiler import LoopProfiler
+from sim.firmware import Simulator
+
+PROF = 5
+MEM = 7
+
+
+def test_profiler_commands_replace_each_other():
+    sim = Simulator()
+    keyboard = sim.keyboard
+    sim.chord(PROF)
+    assert isinstance(keyboard.profiler, LoopProfiler)
+    sim.chord(MEM)
+    assert isinstance(keyboard.profiler, GcMonitor)
+    sim.chord(PROF)
+    assert isinstance(keyboard.profiler, LoopProfiler)
+    sim.chord(PROF)
+    assert keyboard.profiler is None
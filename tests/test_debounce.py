@@ -0,0 +1,28 @@
+# Per key debounce times on the simulated keyboard
+
+from picochord.debounce import TunedScanner, save_intervals
+from picochord.settings import NVM_DEBOUNCE
+from sim.firmware import Simulator
+
+
+def test_calibrated_keys_are_debounced_one_by_one():
+    keyboard = Simulator().keyboard
+    # the simulated devices are only there once a Simulator is made
+    import microcontroller
+    from picochord.keypad_scanner import KeypadScanner
+
+    assert isinstance(keyboard.scanner, KeypadScanner)
+    nvm = microcontroller.nvm
+    saved = bytes(nvm)
+    try:
+        intervals = bytes([1, 3, 3, 4, 6, 9])
+        save_intervals(nvm, intervals, NVM_DEBOUNCE)
+        # keypad is the default, but it can't use a time for each key
+        sim = Simulator()
+        scanner = sim.keyboard.scanner
+        assert isinstance(scanner, TunedScanner)
+        assert bytes(scanner.intervals) == intervals
+        sim.type_text("ok")
+        assert sim.typed() == "ok"
+    finally:
+        nvm[:] = saved
@@ -0,0 +1,128 @@
+# Marquee scheduling on the fake 14 segment display
+
+import time
+
+from picochord.display import DisplayScheduler
+from sim.display import FakeSeg14x4
+
+
+def printed(display):
+    return [value for when, value in display.frames()]
+
+
+def test_one_frame_per_delay():
+    display = FakeSeg14x4()
+    scheduler = DisplayScheduler(display, delay=0.25)
+    scheduler.scroll("abc")
+    start = scheduler.next_time
+    assert scheduler.update(start)
+    assert not scheduler.update(start + 0.1)
+    assert not scheduler.update(start + 0.24)
+    assert scheduler.update(start + 0.25)
+    assert scheduler.update(start + 0.5)
+    assert printed(display) == ["a", "b", "c"]
+    assert display.text == " abc"
+    # the last frame stays up for its delay before the display is free
+    assert scheduler.busy
+    assert not scheduler.update(start + 0.6)
+    assert scheduler.busy
+    scheduler.update(start + 0.75)
+    assert not scheduler.busy
+
+
+def test_late_update_does_not_catch_up():
+    display = FakeSeg14x4()
+    scheduler = DisplayScheduler(display, delay=0.25)
+    scheduler.scroll("abcd")
+    start = scheduler.next_time
+    scheduler.update(start)
+    # held up for a second, the next frame shows and the one after
+    # waits a whole delay
+    assert scheduler.update(start + 1.0)
+    assert not scheduler.update(start + 1.1)
+    assert scheduler.update(start + 1.25)
+    assert printed(display) == ["a", "b", "c"]
+
+
+def test_frame_times_on_the_fake_display():
+    display = FakeSeg14x4()
+    delay = 0.02
+    scheduler = DisplayScheduler(display, delay=delay)
+    scheduler.scroll("hello")
+    longest_update = 0
+    while scheduler.busy:
+        before = time.monotonic()
+        scheduler.update()
+        longest_update = max(longest_update, time.monotonic() - before)
+    frames = display.frames()
+    assert [value for when, value in frames] == list("hello")
+    for index in range(1, len(frames)):
+        assert frames[index][0] - frames[index - 1][0] >= delay - 0.002
+    # update never sleeps while a message scrolls
+    assert longest_update < delay / 2
+
+
+def test_new_message_replaces_scrolling_one():
+    display = FakeSeg14x4()
+    scheduler = DisplayScheduler(display, delay=0.25)
+    scheduler.scroll("first")
+    start = scheduler.next_time
+    scheduler.update(start)
+    scheduler.scroll("xy")
+    scheduler.update(scheduler.next_time)
+    assert printed(display) == ["f", "x"]
+    assert display.text == "   x"
+
+
+def test_show_after_scroll_waits_for_message():
+    display = FakeSeg14x4()
+    scheduler = DisplayScheduler(display, delay=0.25)
+    scheduler.scroll("ab")
+    start = scheduler.next_time
+    scheduler.update(start)
+    scheduler.show_after_scroll("z")
+    scheduler.update(start + 0.25)
+    assert display.text == "  ab"
+    scheduler.update(start + 0.5)
+    assert display.text == "   z"
+    assert not scheduler.busy
+
+
+def test_typed_history_moves_along_a_digit():
+    from picochord.glyphs import GlyphCache
+    from picochord.history import TypedHistory
+
+    display = FakeSeg14x4(auto_write=False)
+    scheduler = DisplayScheduler(display, glyphs=GlyphCache(display))
+    history = TypedHistory()
+    for ch in "hello":
+        history.add_code(ord(ch))
+        scheduler.history_typed(history, ord(ch))
+    assert display.text == "ello"
+    history.backspace()
+    scheduler.show_history(history)
+    assert display.text == "hell"
+    # characters outside ASCII are kept, and shown as a space
+    history.add_code(0x1F600)
+    scheduler.history_typed(history, 0x1F600)
+    assert history.code(0) == 0x1F600
+    assert display.text == "ell "
+
+
+def test_typed_history_points_match_a_redraw():
+    from picochord.glyphs import GlyphCache
+    from picochord.history import TypedHistory
+
+    for text in (".", "a.", "a.b", "ab..", ".abcde.", "abcd.e"):
+        display = FakeSeg14x4(auto_write=False)
+        scheduler = DisplayScheduler(display, glyphs=GlyphCache(display))
+        history = TypedHistory()
+        scheduler.show_history(history)
+        for ch in text:
+            history.add_code(ord(ch))
+            scheduler.history_typed(history, ord(ch))
+        typed = bytes(display._buffer)
+        scheduler.show_history(history)
+        assert bytes(display._buffer) == typed, text
+        scheduler.show(text)
+        assert bytes(display._buffer) == typed, text
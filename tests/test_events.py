@@ -0,0 +1,168 @@
+# Key event queue and chord assembly, from recorded event streams
+
+import pytest
+
+from picochord.events import ChordAssembler, EventQueue, KEY_DOWN, KEY_UP
+from picochord.rollover import RolloverAssembler
+from sim.replay import record, replay
+
+# Typing "a" (bits 4 and 8 pressed, released together), then "e" with
+# the keys landing and lifting at different times, then a single key.
+# Times are millisecond ticks.
+RECORDED = [
+    (1, 4, KEY_DOWN),
+    (2, 8, KEY_DOWN),
+    (60, 12, KEY_UP),
+    (150, 2, KEY_DOWN),
+    (152, 16, KEY_DOWN),
+    (154, 32, KEY_DOWN),
+    (230, 16, KEY_UP),
+    (236, 2, KEY_UP),
+    (241, 32, KEY_UP),
+    (300, 1, KEY_DOWN),
+    (340, 1, KEY_UP),
+]
+
+
+def test_replay_gives_one_chord_per_character():
+    chords, queue = replay(RECORDED)
+    # the chord is every key held at the first release, later releases
+    # of the same chord are ignored
+    assert chords == [12, 50, 1]
+    assert queue.dropped == 0
+    assert len(queue) == 0
+
+
+def test_record_round_trip():
+    queue = EventQueue(16)
+    for ticks, mask, edge in RECORDED:
+        queue.put(mask, edge, ticks)
+    assert record(queue) == RECORDED
+    assert len(queue) == 0
+
+
+def test_slow_consumer_loses_nothing_while_queue_has_room():
+    chords, queue = replay(RECORDED, queue_size=16, batch=len(RECORDED))
+    assert chords == [12, 50, 1]
+    assert queue.dropped == 0
+    assert queue.high_water == len(RECORDED)
+
+
+def test_overflow_is_counted():
+    queue = EventQueue(4)
+    for ticks, mask, edge in RECORDED[:6]:
+        queue.put(mask, edge, ticks)
+    assert queue.dropped == 2
+    assert queue.high_water == 4
+    # the oldest events are kept
+    assert record(queue) == RECORDED[:4]
+
+
+def test_overflow_during_replay():
+    chords, queue = replay(RECORDED, queue_size=4, batch=8)
+    assert queue.dropped == 4
+    assert queue.high_water == 4
+
+
+def test_lost_release_does_not_leave_keys_stuck():
+    for assembler_class in (ChordAssembler, RolloverAssembler):
+        queue = EventQueue(4)
+        held = [0]
+        chords = []
+        assembler = assembler_class(queue, chords.append,
+            held_keys=lambda: held[0])
+        # the consumer is held up while "a" is typed with a key bouncing,
+        # and the release of "a" doesn't fit in the queue
+        queue.put(4, KEY_DOWN, 0)
+        queue.put(8, KEY_DOWN, 2)
+        queue.put(2, KEY_DOWN, 20)
+        queue.put(2, KEY_UP, 22)
+        assert not queue.put(12, KEY_UP, 60)
+        # the control key is still down when the consumer catches up
+        held[0] = 1
+        assembler.process()
+        assert assembler.bits == 1
+        # it has to come up before the next chord
+        queue.put(1, KEY_UP, 100)
+        queue.put(16, KEY_DOWN, 150)
+        queue.put(16, KEY_UP, 200)
+        assembler.process()
+        assert chords == [16]
+        assert assembler.bits == 0
+
+
+def test_queue_size_must_be_power_of_two():
+    with pytest.raises(ValueError):
+        EventQueue(12)
+
+
+def test_assembler_reset_discards_queued_events():
+    queue = EventQueue(8)
+    chords = []
+    assembler = ChordAssembler(queue, chords.append)
+    queue.put(4, KEY_DOWN, 0)
+    assembler.process()
+    queue.put(4, KEY_UP, 10)
+    assembler.reset()
+    assembler.process()
+    assert chords == []
+    assert assembler.bits == 0
+
+
+# "b" (bits 8, 16 and 32) with the last key landing 40 ms after the first
+# and the keys lifted unevenly
+UNEVEN_B = [
+    (0, 8, KEY_DOWN),
+    (10, 16, KEY_DOWN),
+    (40, 32, KEY_DOWN),
+    (60, 8, KEY_UP),
+    (70, 16, KEY_UP),
+    (80, 32, KEY_UP),
+]
+
+
+def test_uneven_chord_is_one_chord():
+    chords, queue = replay(UNEVEN_B)
+    assert chords == [56]
+    chords, queue = replay(UNEVEN_B, assembler_class=RolloverAssembler)
+    assert chords == [56]
+
+
+# "a" (bits 4 and 8) with "e" (bits 2, 16 and 32) started before it is
+# released, then "t" (bits 4 and 16) rolled from "e" with one key held on
+# its own until after the "e" keys are up
+ROLLED = [
+    (0, 12, KEY_DOWN),
+    (80, 2, KEY_DOWN),
+    (100, 12, KEY_UP),
+    (110, 48, KEY_DOWN),
+    (180, 4, KEY_DOWN),
+    (200, 50, KEY_UP),
+    (230, 16, KEY_DOWN),
+    (300, 20, KEY_UP),
+]
+
+
+def test_rolled_chords_are_kept_apart():
+    chords, queue = replay(ROLLED, assembler_class=RolloverAssembler)
+    assert chords == [12, 50, 20]
+    # the plain assembler loses the rolled characters
+    chords, queue = replay(ROLLED)
+    assert chords == [14]
+
+
+def test_rolled_key_held_on_its_own_starts_next_chord():
+    events = [
+        (0, 12, KEY_DOWN),
+        (80, 1, KEY_DOWN),
+        (100, 12, KEY_UP),
+        (200, 1, KEY_UP),
+    ]
+    chords, queue = replay(events, assembler_class=RolloverAssembler)
+    assert chords == [12, 1]
+
+
+def test_recorded_stream_through_rollover():
+    chords, queue = replay(RECORDED, assembler_class=RolloverAssembler)
+    assert chords == [12, 50, 1]
+
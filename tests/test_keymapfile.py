@@ -0,0 +1,77 @@
+# Compiled keymap files
+
+import os
+
+import pytest
+
+from picochord.keymapfile import parse_keymap
+from tools.keymapc import KeymapError, build_tables, compile_keymap, encode_tables, parse_source
+
+SOURCE = """
+[lower]
+4 'a'
+8 'b'
+[numbers]
+4 '1'
+[symbols]
+4 '!'
+[all]
+1 command caps
+2 key 42
+"""
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+COMMANDS = {"caps": ("caps", None, "Toggle CAPS lock")}
+
+
+def key_command(code):
+    return ("key", code)
+
+
+def test_round_trip():
+    tables = parse_keymap(compile_keymap(SOURCE), COMMANDS, key_command)
+    assert len(tables) == 4
+    upper, lower, numbers, symbols = tables
+    assert lower[4] == "a"
+    assert upper[8] == "B"
+    assert numbers[4] == "1"
+    assert symbols[1] == COMMANDS["caps"]
+    assert symbols[2] == ("key", 42)
+
+
+def test_wrong_number_of_states_is_rejected():
+    tables = build_tables(parse_source(SOURCE))
+    with pytest.raises(ValueError):
+        parse_keymap(encode_tables(tables[:2]), COMMANDS, key_command)
+
+
+def test_non_ascii_text_is_rejected():
+    with pytest.raises(KeymapError):
+        compile_keymap("[lower]\n4 'é'\n")
+    data = bytearray(compile_keymap("[lower]\n4 'e'\n"))
+    pos = data.index(b"e")
+    data[pos] = 0xE9
+    with pytest.raises(ValueError):
+        parse_keymap(bytes(data), COMMANDS, key_command)
+
+
+def names(tables):
+    # the tables with each command replaced by its name
+    result = []
+    for table in tables:
+        result.append([entry[0] if isinstance(entry, tuple) else entry for entry in table])
+    return result
+
+
+def test_supplied_source_matches_built_in_layout():
+    from sim.firmware import Simulator
+
+    keyboard = Simulator().keyboard
+    commands = {}
+    for command in keyboard.command_actions.values():
+        commands[command[0]] = command
+    with open(os.path.join(ROOT, "tools", "keymap.txt")) as file:
+        data = compile_keymap(file.read())
+    tables = parse_keymap(data, commands, keyboard.key_command)
+    assert names(tables) == names(keyboard.chord_tables)
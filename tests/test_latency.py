@@ -0,0 +1,42 @@
+# Chord latency figures, and the latency budget on the simulator
+
+from picochord.latency import LatencyHistogram, LatencyMonitor
+from sim.firmware import Simulator
+
+# longest time from the key release that completes a chord to its
+# keyboard report, with the host taking reports straight away
+RELEASE_BUDGET_US = 20000
+
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram(bucket_us=100, buckets=10)
+    for us in range(0, 1000, 10):
+        histogram.record(us)
+    assert histogram.count == 100
+    assert histogram.percentile(50) == 500
+    assert histogram.percentile(95) == 990
+    assert histogram.max_us == 990
+
+
+def test_histogram_overflow_bucket():
+    histogram = LatencyHistogram(bucket_us=100, buckets=10)
+    histogram.record(50)
+    histogram.record(5000)
+    assert histogram.counts[9] == 1
+    assert histogram.percentile(99) == 5000
+
+
+def test_typing_is_within_budget():
+    sim = Simulator()
+    keyboard = sim.keyboard
+    sim.run_for(0.05)
+    keyboard.latency = LatencyMonitor()
+    sim.type_text("hello")
+    sim.run_for(0.05)
+    latency = keyboard.latency
+    assert sim.typed() == "hello"
+    assert latency.release.count == 5
+    assert latency.decode.count == 5
+    assert latency.release.percentile(99) <= RELEASE_BUDGET_US
+    # the press is always before the release
+    assert latency.chord.percentile(50) >= latency.release.percentile(50)
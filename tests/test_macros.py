@@ -0,0 +1,45 @@
+# Abbreviation expansion from compiled macro files
+
+import pytest
+
+from picochord.macros import MacroExpander, load_macros
+from tools.macroc import compile_macros, parse_source
+
+SOURCE = "btw by the way\nbtwn between\n"
+
+
+def expand(macros, text):
+    # Returns the expansions triggered while typing text
+    result = []
+    for ch in text:
+        number = macros.typed(ch)
+        if number >= 0:
+            start, end = macros.expansion(number)
+            result.append((macros.trigger_length, str(macros.data[start:end], "ascii")))
+    return result
+
+
+def test_triggers_expand():
+    macros = MacroExpander(compile_macros(parse_source(SOURCE)))
+    assert expand(macros, "btw ") == [(3, "by the way")]
+    assert expand(macros, "btwn.") == [(4, "between")]
+    assert expand(macros, "abtw ") == []
+
+
+def test_backspace_steps_back():
+    macros = MacroExpander(compile_macros(parse_source(SOURCE)))
+    expand(macros, "btwx")
+    macros.backspace()
+    assert expand(macros, " ") == [(3, "by the way")]
+
+
+@pytest.mark.parametrize("data", [b"", b"PCMX", b"PCMX\x01"])
+def test_truncated_file_is_rejected(tmp_path, data):
+    path = tmp_path / "macros.bin"
+    path.write_bytes(data)
+    with pytest.raises(ValueError):
+        load_macros(str(path))
+
+
+def test_missing_file_gives_none(tmp_path):
+    assert load_macros(str(tmp_path / "macros.bin")) is None
@@ -0,0 +1,99 @@
+# The keyboard under the asyncio runtime, on the simulated devices
+
+import asyncio
+import time
+
+from sim.firmware import Simulator
+
+
+def test_typing_under_asyncio():
+    sim = Simulator()
+
+    async def script(sim):
+        await sim.type_text_async("hi there")
+        await asyncio.sleep(0.05)
+
+    runtime = sim.run_async(script)
+    assert not runtime.running
+    assert sim.typed() == "hi there"
+
+
+def test_scanning_continues_while_message_scrolls():
+    sim = Simulator()
+    keyboard = sim.keyboard
+    scheduler = keyboard.display_scheduler
+    # time the start up message takes to scroll past
+    scroll_time = len(scheduler.text) * scheduler.delay
+
+    async def script(sim):
+        start = time.monotonic()
+        assert scheduler.busy
+        await sim.type_text_async("ok")
+        await asyncio.sleep(0.05)
+        assert sim.typed() == "ok"
+        assert time.monotonic() - start < scroll_time / 2
+
+    sim.run_async(script)
+
+
+def test_split_runtime_times_chords_from_the_release():
+    from picochord.latency import LatencyMonitor
+    from picochord.splitcore import InlineBackend, SplitRuntime
+
+    sim = Simulator(use_keypad=False)
+    keyboard = sim.keyboard
+    runtime = SplitRuntime(keyboard, InlineBackend())
+    runtime.start()
+    keyboard.latency = LatencyMonitor()
+    side = runtime.side
+    bits = keyboard.lookup_character("a")[0]
+    sim.press(bits)
+    while keyboard.scanner.state & bits != bits:
+        side.step()
+    sim.release(bits)
+    while len(side.chords) == 0:
+        side.step()
+    # the output side is held up before it takes the chord
+    time.sleep(0.02)
+    runtime.take_chords()
+    runtime.stop()
+    assert keyboard.latency.decode.count == 1
+    assert keyboard.latency.decode.max_us >= 20000
+
+
+def test_tick_runtime_samples_the_keys_every_tick():
+    from picochord.scanner import ChordScanner
+    from picochord.settings import DEBOUNCE_TIME
+    from picochord.ticks import TickRuntime
+
+    sim = Simulator(use_keypad=False)
+    keyboard = sim.keyboard
+    keyboard.display_scheduler.cancel()
+    # the scanner make_scanner gives with USE_TICKS
+    scanner = ChordScanner(keyboard.scanner.bank, interval=DEBOUNCE_TIME,
+        scan_rate=1000)
+    keyboard.scanner = scanner
+    assert scanner.samples == 11
+    runtime = TickRuntime(keyboard, scan_rate=1000)
+    runtime.start()
+    # an idle keyboard still only ticks once a millisecond
+    start = time.monotonic()
+    while time.monotonic() - start < 0.1:
+        runtime.tick()
+    assert runtime.ticks <= 110
+    bits = keyboard.lookup_character("a")[0]
+    sim.press(bits)
+    start = time.monotonic()
+    ticks = 0
+    while scanner.state != bits:
+        runtime.tick()
+        ticks = ticks + 1
+    # the debounce interval is counted in ticks, and takes its real time
+    assert ticks == 11
+    assert time.monotonic() - start >= DEBOUNCE_TIME
+    sim.release(bits)
+    for _ in range(20):
+        runtime.tick()
+    runtime.stop()
+    assert scanner.state == 0
+    assert sim.typed() == "a"
@@ -0,0 +1,3 @@
+# Host side tools for building files for the PICO Chord keyboard
+#
+# Nothing in here is copied onto the PICO.
@@ -0,0 +1,110 @@
+# Build the files to copy onto the PICO
+#
+# CircuitPython compiles .py files to bytecode every time they are
+# imported, which slows down start up and fills the heap while it
+# happens. This compiles the keyboard program and the libraries it uses
+# to .mpy files with mpy-cross and lays them out the way they go on the
+# CIRCUITPY drive:
+#
+#   python -m tools.build [--mpy-cross path] [--out build]
+#
+# mpy-cross must be the version for the CircuitPython on the PICO. It
+# is in the CircuitPython downloads. code.py and the settings are left
+# as source so that they can still be edited on the PICO.
+#
+# The build folder is emptied first. A folder given with --out, which
+# may be the CIRCUITPY drive itself, is only written into, never
+# emptied.
+
+import os
+import shutil
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BUILD_FOLDER = os.path.join(ROOT, "build")
+# files copied as they are
+SOURCE_FILES = ("code.py", os.path.join("picochord", "settings.py"))
+# the keyboard program and the libraries in lib that it uses
+PACKAGES = ("picochord",)
+LIBRARIES = ("adafruit_bus_device", "adafruit_hid", "adafruit_ht16k33", "neopixel.py")
+
+
+def compile_file(mpy_cross, source, target):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    subprocess.run([mpy_cross, "-o", target, source], check=True)
+
+
+def build_tree(mpy_cross, source, target):
+    # Compile every .py file in source into target, copying .mpy files
+    # that are already compiled. Returns the number of files written.
+    count = 0
+    if os.path.isfile(source):
+        names = [(os.path.dirname(source), [os.path.basename(source)])]
+    else:
+        names = []
+        for folder, dirs, files in os.walk(source):
+            dirs[:] = [name for name in dirs if name != "__pycache__"]
+            names.append((folder, sorted(files)))
+    base = os.path.dirname(source)
+    for folder, files in names:
+        for name in files:
+            path = os.path.join(folder, name)
+            relative = os.path.relpath(path, base)
+            if relative in SOURCE_FILES:
+                continue
+            if name.endswith(".py"):
+                compile_file(mpy_cross, path, os.path.join(target, relative[:-3] + ".mpy"))
+            elif name.endswith(".mpy"):
+                os.makedirs(os.path.dirname(os.path.join(target, relative)), exist_ok=True)
+                shutil.copyfile(path, os.path.join(target, relative))
+            else:
+                continue
+            count = count + 1
+    return count
+
+
+def build(out, mpy_cross="mpy-cross"):
+    if shutil.which(mpy_cross) is None:
+        raise FileNotFoundError("Can't find " + mpy_cross +
+            ", get the mpy-cross for your CircuitPython version")
+    # only the folder this tool owns is emptied first
+    if os.path.abspath(out) == BUILD_FOLDER and os.path.exists(out):
+        shutil.rmtree(out)
+    count = 0
+    for package in PACKAGES:
+        count = count + build_tree(mpy_cross, os.path.join(ROOT, package), out)
+    lib = os.path.join(out, "lib")
+    for library in LIBRARIES:
+        count = count + build_tree(mpy_cross, os.path.join(ROOT, "lib", library), lib)
+    for name in SOURCE_FILES:
+        target = os.path.join(out, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(os.path.join(ROOT, name), target)
+        count = count + 1
+    return count
+
+
+def main(args):
+    out = BUILD_FOLDER
+    mpy_cross = "mpy-cross"
+    while args:
+        if args[0] == "--out" and len(args) > 1:
+            out = args[1]
+        elif args[0] == "--mpy-cross" and len(args) > 1:
+            mpy_cross = args[1]
+        else:
+            print("Usage: python -m tools.build [--mpy-cross path] [--out folder]")
+            return 2
+        args = args[2:]
+    try:
+        count = build(out, mpy_cross)
+    except (FileNotFoundError, subprocess.CalledProcessError) as e:
+        print(e)
+        return 1
+    print("{0} files in {1}, copy them onto the CIRCUITPY drive".format(count, out))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
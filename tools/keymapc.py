@@ -0,0 +1,212 @@
+# Keymap compiler
+#
+# Compiles a readable keymap source file into the binary keymap file
+# that the keyboard loads at start up:
+#
+#   python -m tools.keymapc tools/keymap.txt keymap.bin
+#
+# Copy keymap.bin onto the root folder of the PICO to use it. The source
+# for the built in layout can be written out with:
+#
+#   python -m tools.keymapc --builtin tools/keymap.txt
+#
+# Each [section] of the source is a keyboard state. A line gives the
+# chord bits and what the chord does: quoted text, "command <name>" or
+# "key <Keycode name or number>". Entries in the [all] section are added
+# to every state for chords that the state doesn't use. If there is no
+# [upper] section the upper case state is the [lower] one in capitals.
+# Anything after a # is ignored, except in quoted text.
+
+import ast
+import sys
+
+from picochord.dispatch import CHORD_COUNT
+from picochord.keymapfile import (ENTRY_COMMAND, ENTRY_KEYCODE, MAGIC, MAX_COMMANDS,
+    MAX_TEXT, VERSION)
+
+# section names in keyboard state order
+STATES = ("upper", "lower", "numbers", "symbols")
+
+
+class KeymapError(Exception):
+    pass
+
+
+def keycode_value(name):
+    if name.isdigit():
+        return int(name)
+    from sim.firmware import install
+    install()
+    from adafruit_hid.keycode import Keycode
+    if not hasattr(Keycode, name):
+        raise KeymapError("Unknown keycode " + name)
+    return getattr(Keycode, name)
+
+
+def parse_entry(text):
+    # Returns ("text", str), ("command", name) or ("key", code)
+    if text[0] in "'\"":
+        value = ast.literal_eval(text)
+        if not isinstance(value, str) or not value:
+            raise KeymapError("Bad text " + text)
+        # the keyboard layout only has keys for ASCII characters
+        if not value.isascii():
+            raise KeymapError("Text must be ASCII: " + text)
+        return ("text", value)
+    words = text.split()
+    if len(words) == 2 and words[0] == "command":
+        return ("command", words[1])
+    if len(words) == 2 and words[0] == "key":
+        return ("key", keycode_value(words[1]))
+    raise KeymapError("Don't understand " + text)
+
+
+def strip_comment(line):
+    # remove a comment, leaving any # inside quoted text alone
+    quote = None
+    pos = 0
+    while pos < len(line):
+        ch = line[pos]
+        if quote is not None:
+            if ch == "\\":
+                # skip the escaped character
+                pos = pos + 1
+            elif ch == quote:
+                quote = None
+        elif ch in "'\"":
+            quote = ch
+        elif ch == "#":
+            return line[:pos]
+        pos = pos + 1
+    return line
+
+
+def parse_source(source):
+    # Returns a dictionary of section name to {bits: entry}
+    sections = {}
+    section = None
+    for number, line in enumerate(source.splitlines(), 1):
+        line = strip_comment(line).strip()
+        if not line:
+            continue
+        try:
+            if line.startswith("["):
+                name = line.strip("[]").strip()
+                if name not in STATES and name != "all":
+                    raise KeymapError("Unknown section " + name)
+                section = sections.setdefault(name, {})
+                continue
+            if section is None:
+                raise KeymapError("Entry before the first section")
+            bits, entry = line.split(None, 1)
+            bits = int(bits, 0)
+            if not 0 < bits < CHORD_COUNT:
+                raise KeymapError("Chord bits out of range")
+            if bits in section:
+                raise KeymapError("Chord " + str(bits) + " is used twice")
+            section[bits] = parse_entry(entry)
+        except (KeymapError, ValueError, SyntaxError) as e:
+            raise KeymapError("Line {0}: {1}".format(number, e))
+    return sections
+
+
+def build_tables(sections):
+    # One list of CHORD_COUNT entries for each state
+    if "upper" not in sections and "lower" in sections:
+        upper = {}
+        for bits, entry in sections["lower"].items():
+            if entry[0] == "text":
+                entry = ("text", entry[1].upper())
+            upper[bits] = entry
+        sections["upper"] = upper
+    tables = []
+    for name in STATES:
+        table = [None] * CHORD_COUNT
+        for entries in (sections.get("all", {}), sections.get(name, {})):
+            for bits, entry in entries.items():
+                table[bits] = entry
+        tables.append(table)
+    return tables
+
+
+def encode_tables(tables):
+    names = []
+    for table in tables:
+        for entry in table:
+            if entry is not None and entry[0] == "command" and entry[1] not in names:
+                names.append(entry[1])
+    if len(names) > MAX_COMMANDS:
+        raise KeymapError("Too many commands")
+    data = bytearray(MAGIC)
+    data.extend((VERSION, len(tables), len(names)))
+    for name in names:
+        encoded = name.encode("ascii")
+        data.append(len(encoded))
+        data.extend(encoded)
+    for table in tables:
+        for entry in table:
+            if entry is None:
+                data.append(0)
+            elif entry[0] == "text":
+                encoded = entry[1].encode("ascii")
+                if len(encoded) > MAX_TEXT:
+                    raise KeymapError("Text is too long: " + entry[1])
+                data.append(len(encoded))
+                data.extend(encoded)
+            elif entry[0] == "command":
+                data.append(ENTRY_COMMAND + names.index(entry[1]))
+            else:
+                data.append(ENTRY_KEYCODE)
+                data.append(entry[1])
+    return bytes(data)
+
+
+def compile_keymap(source):
+    return encode_tables(build_tables(parse_source(source)))
+
+
+def builtin_source():
+    # Source for the layout built into the keyboard
+    from picochord import keymap
+    from sim.firmware import Simulator
+
+    keyboard = Simulator().keyboard
+    lines = ["# PICO Chord built in layout", ""]
+    for name, decode in (("lower", keymap.TEXT_DECODE), ("numbers", keymap.NUM_DECODE),
+            ("symbols", keymap.SYM_DECODE)):
+        lines.append("[" + name + "]")
+        for bits in sorted(decode):
+            lines.append("{0:<3}{1!r}".format(bits, decode[bits]))
+        lines.append("")
+    lines.append("[all]")
+    for bits in sorted(keyboard.command_actions):
+        command = keyboard.command_actions[bits]
+        lines.append("{0:<3}command {1:<6}# {2}".format(bits, command[0], command[2]))
+    lines.append("")
+    return "\n".join(lines)
+
+
+def main(args):
+    if len(args) == 2 and args[0] == "--builtin":
+        with open(args[1], "w") as file:
+            file.write(builtin_source())
+        return 0
+    if len(args) != 2:
+        print("Usage: python -m tools.keymapc source.txt keymap.bin")
+        print("       python -m tools.keymapc --builtin source.txt")
+        return 2
+    with open(args[0]) as file:
+        source = file.read()
+    try:
+        data = compile_keymap(source)
+    except KeymapError as e:
+        print(args[0] + ":", e)
+        return 1
+    with open(args[1], "wb") as file:
+        file.write(data)
+    print("{0}: {1} bytes".format(args[1], len(data)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
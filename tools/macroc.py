@@ -0,0 +1,132 @@
+# Macro compiler
+#
+# Compiles a list of abbreviations into the macro file that the keyboard
+# loads at start up:
+#
+#   python -m tools.macroc tools/macros.txt macros.bin
+#
+# Copy macros.bin onto the root folder of the PICO to use it. Each line
+# of the source is a trigger word followed by the text that replaces it.
+# Lines starting with # are ignored.
+
+import sys
+
+from picochord.macros import (CHILD_SIZE, HEADER_SIZE, INDEX_SIZE, MAGIC, NODE_HEADER,
+    VERSION, is_word_char)
+
+
+class MacroError(Exception):
+    pass
+
+
+def parse_source(source):
+    # Returns a dictionary of trigger to expansion
+    macros = {}
+    for number, line in enumerate(source.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        parts = line.split(None, 1)
+        if len(parts) != 2:
+            raise MacroError("Line {0}: no expansion for {1}".format(number, line))
+        trigger, expansion = parts
+        for ch in trigger:
+            if not is_word_char(ch) or ord(ch) >= 128:
+                raise MacroError("Line {0}: {1!r} can't be in a trigger".format(number, ch))
+        if trigger in macros:
+            raise MacroError("Line {0}: {1} is used twice".format(number, trigger))
+        macros[trigger] = expansion
+    return macros
+
+
+def build_trie(triggers):
+    # Returns the nested trie of {character code: node} dictionaries, with
+    # the expansion number under the key None where a trigger ends
+    root = {}
+    for number, trigger in enumerate(triggers):
+        node = root
+        for ch in trigger:
+            node = node.setdefault(ord(ch), {})
+        node[None] = number
+    return root
+
+
+def encode_nodes(root):
+    # Lay the nodes out depth first and return the bytes of the node area
+    offsets = []
+    order = []
+
+    def place(node, offset):
+        order.append(node)
+        offsets.append(offset)
+        children = sorted(code for code in node if code is not None)
+        offset = offset + NODE_HEADER + len(children) * CHILD_SIZE
+        for code in children:
+            offset = place(node[code], offset)
+        return offset
+
+    size = place(root, 0)
+    if size > 0xFFFF:
+        raise MacroError("Too many macros")
+    where = {}
+    for node, offset in zip(order, offsets):
+        where[id(node)] = offset
+    data = bytearray()
+    for node in order:
+        children = sorted(code for code in node if code is not None)
+        expansion = node.get(None, -1) + 1
+        data.append(len(children))
+        data.extend(expansion.to_bytes(2, "little"))
+        for code in children:
+            data.append(code)
+            data.extend(where[id(node[code])].to_bytes(2, "little"))
+    return bytes(data)
+
+
+def compile_macros(macros):
+    triggers = list(macros)
+    if not triggers:
+        raise MacroError("No macros")
+    longest = max(len(trigger) for trigger in triggers)
+    if longest > 255:
+        raise MacroError("Trigger is too long")
+    nodes = encode_nodes(build_trie(triggers))
+    index = bytearray()
+    text = bytearray()
+    for trigger in triggers:
+        encoded = macros[trigger].encode("ascii")
+        if len(encoded) > 255:
+            raise MacroError("Expansion of " + trigger + " is too long")
+        index.extend(len(text).to_bytes(2, "little"))
+        index.append(len(encoded))
+        text.extend(encoded)
+    if len(text) > 0xFFFF:
+        raise MacroError("Too much expansion text")
+    data = bytearray(MAGIC)
+    data.append(VERSION)
+    data.append(longest)
+    data.extend(len(nodes).to_bytes(2, "little"))
+    data.extend(len(triggers).to_bytes(2, "little"))
+    assert len(data) == HEADER_SIZE and len(index) == len(triggers) * INDEX_SIZE
+    return bytes(data + nodes + index + text)
+
+
+def main(args):
+    if len(args) != 2:
+        print("Usage: python -m tools.macroc macros.txt macros.bin")
+        return 2
+    with open(args[0]) as file:
+        source = file.read()
+    try:
+        data = compile_macros(parse_source(source))
+    except (MacroError, UnicodeEncodeError) as e:
+        print(args[0] + ":", e)
+        return 1
+    with open(args[1], "wb") as file:
+        file.write(data)
+    print("{0}: {1} bytes".format(args[1], len(data)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,31 @@
+# Prediction model trainer
+#
+# Trains the next character prediction on some text files and writes
+# the model file that the keyboard loads when prediction is turned on:
+#
+#   python -m tools.ngramc ngram.bin book.txt letters.txt
+#
+# Copy ngram.bin onto the root folder of the PICO to use it. The
+# keyboard carries on learning from what is typed.
+
+import sys
+
+from picochord.predict import NgramPredictor
+
+
+def main(args):
+    if len(args) < 2:
+        print("Usage: python -m tools.ngramc ngram.bin text.txt ...")
+        return 2
+    predictor = NgramPredictor()
+    for name in args[1:]:
+        with open(name, encoding="utf-8", errors="replace") as file:
+            # the keyboard doesn't type line breaks, a space is closest
+            predictor.train(" ".join(file.read().split()))
+    predictor.save(args[0])
+    print("{0}: trained on {1} files".format(args[0], len(args) - 1))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))